@@ -8,6 +8,7 @@ else:
 
 # This loads BT82x family definitions only.
 import bteve2
+from bteve2.ramg import Allocator
 
 class run:
     def __init__(self, app, patch=None, autotouch=True, minimal=False, connector=None, panel="WUXGA"):
@@ -92,19 +93,25 @@ class run:
                 raise (f"ram size unknown")
         # The top 0x280000 of RAM_G is reserved
         eve.ramgtop = eve.ramgsize - 0x280000
+        # Allocate RAM_G for the application from eve.ramg
+        eve.ramg = Allocator(0, eve.ramgtop)
 
         if not minimal:
             # Screen memory size
             scrsize = (surface.w * surface.h * 3)
             # Available top of memory is below screen scanchain
             top = eve.ramgtop - (2 * scrsize)
+            eve.ramg = Allocator(0, top)
 
+            # The swapchain is set up in the same co-processor list as the
+            # panel registers, panel() waits for them.
             eve.LIB_BeginCoProList()
-            eve.CMD_REGWRITE(eve.REG_SC0_SIZE, 2)
-            eve.CMD_REGWRITE(eve.REG_SC0_PTR0, top)
-            eve.CMD_REGWRITE(eve.REG_SC0_PTR1, top + scrsize)
+            eve.write_registers((
+                (eve.REG_SC0_SIZE, 2),
+                (eve.REG_SC0_PTR0, top),
+                (eve.REG_SC0_PTR1, top + scrsize),
+                ))
             eve.LIB_EndCoProList()
-            eve.LIB_AwaitCoProEmpty()
 
             eve.panel(surface, panel, touch, top)
 
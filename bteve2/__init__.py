@@ -13,7 +13,7 @@ try:
 except:
     from ._eve import _EVE
   
-from .eve import CoprocessorException, EVE2 as e_EVE2
+from .eve import CoprocessorException, ResultException, EVE2 as e_EVE2
 
 """
 This module is designed to be used as a subclass of a superclass that 
@@ -22,20 +22,27 @@ read/write to the EVE2 hardware.
 
     reset()          Strobe the reset pin
     rd(a, n)         Read bytes
+    rd_into(a, buf)  Read bytes into a memoryview (optional)
     wr(a, s, inc)    Write bytes
+    writev(a, bufs, inc)  Write a list of buffers (optional)
+    transfer(ops)    Run a list of reads and writes together (optional)
 
 It has 2 subclasses, EVE2 and _EVE. 
 
-The _EVE class is in the file _eve.py. This contains all the display
-list command definitions and low-level methods for formatting commands
-for the EVE display list and co-processor. Commands are added to a 
-buffer which is then flushed to the EVE device using the raw read/write
-methods.
+The _EVE class is in the file _eve.py. This contains the low-level 
+methods for formatting commands for the EVE display list and 
+co-processor. Commands are added to a buffer which is then flushed to 
+the EVE device using the raw read/write methods.
 
 The EVE2 class is in the file eve.py. This is the co-processor file and
 has code to manage the co-processor operation and the RAM_CMD area. 
 It uses the raw read/write methods to access co-processor registers.
 
+The display list and co-processor commands are described by the tables
+in the file commands.py. The encoder methods for EVE2 are made from these
+tables. tests/test_commands.py checks them against the hand-written
+encoders they replaced.
+
 """
 
 # Set the size and the display format of the display
@@ -101,7 +108,13 @@ class EVE2(e_EVE2, _EVE):
         self.sleepclocks = self.connector.sleepclocks
         self.addr = self.connector.addr
         self.rd = self.connector.rd
+        if hasattr(self.connector, "rd_into"):
+            self.rd_into = self.connector.rd_into
         self.wr = self.connector.wr
+        if hasattr(self.connector, "writev"):
+            self.writev = self.connector.writev
+        if hasattr(self.connector, "transfer"):
+            self.transfer = self.connector.transfer
         self.cs = self.connector.cs
         self.reset = self.connector.reset
         self.getcalibration = self.connector.getcalibration
@@ -0,0 +1,179 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import json
+import hashlib
+
+from .eve import align4
+
+# Skip uploads of assets which are already in RAM_G.
+# Each upload is keyed by a hash of its content and the way it is loaded.
+# The manifest file on the host records the address, size, CRC and image
+# properties of each upload. When the same asset is loaded at the same
+# address on a later run, the CRC of the memory on the device is checked
+# with CMD_MEMCRC and the upload is skipped when it matches.
+#
+#   cache = AssetCache(eve)
+#   with open("logo.png", "rb") as f:
+#       cache.image(f.read(), addr)
+#   cache.save()
+#
+# The CRCs of all the assets in the manifest are checked together the
+# first time an asset is loaded. The size and image properties of new
+# uploads are queued co-processor results, see EVE2.result(). They are
+# read together by save(), so loading assets does not wait for the
+# co-processor.
+
+# A value which is known already, with the result() method of a Result.
+class Known:
+
+    def __init__(self, value):
+        self.value = value
+        self.done = True
+
+    def result(self):
+        return self.value
+
+# A value made from co-processor results when it is first needed.
+class Later:
+
+    def __init__(self, make):
+        self.make = make
+        self.done = False
+        self.value = None
+
+    def result(self):
+        if not self.done:
+            self.value = self.make()
+            self.done = True
+        return self.value
+
+class AssetCache:
+
+    def __init__(self, eve, filename = "assets.json"):
+        self.eve = eve
+        self.filename = filename
+        try:
+            with open(filename) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        # Keys of the assets which are on the device, set by check().
+        self.valid = None
+        # New uploads whose size is a queued result, as (key, address,
+        # end, image). end is the Result of CMD_GETPTR, or the size when
+        # it is known, and image is the Result of CMD_GETIMAGE or None.
+        self.pending = []
+        # New uploads waiting for their CRC.
+        self.new = []
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, options, data):
+        h = hashlib.sha1(data)
+        h.update(("%s:%d" % (kind, options)).encode())
+        return h.hexdigest()
+
+    # Read the CRC of every asset in the manifest with one wait for the
+    # co-processor.
+    def check(self):
+        results = [(k, self.eve.CMD_MEMCRC_async(e["address"], e["size"])) for (k, e) in self.manifest.items()]
+        self.valid = set(k for (k, r) in results if r.result() == self.manifest[k]["crc"])
+
+    def lookup(self, key, address):
+        if self.valid is None:
+            self.check()
+        e = self.manifest.get(key)
+        if (e is not None) and (e["address"] == address) and self.overwritten(e):
+            # A new upload may be over it, its size is needed.
+            self.settle()
+        if (e is not None) and (e["address"] == address) and (key in self.valid):
+            self.hits += 1
+            return e
+        self.misses += 1
+        return None
+
+    # Return True if a pending upload may overlap the asset e.
+    def overwritten(self, e):
+        for (key, address, end, image) in self.pending:
+            if address < e["address"] + e["size"]:
+                if (address >= e["address"]) or not isinstance(end, int) or (address + end > e["address"]):
+                    return True
+        return False
+
+    # Record the new uploads in the manifest. This waits for the
+    # co-processor once, if their results have not been read yet.
+    def settle(self):
+        uploads = self.pending
+        self.pending = []
+        for (key, address, end, image) in uploads:
+            if isinstance(end, int):
+                size = end
+            else:
+                size = end.result() - address
+            if image is not None:
+                image = tuple(image.result()[1:4])
+            # Forget assets which are overwritten by this one.
+            for (k, e) in list(self.manifest.items()):
+                if (e["address"] < address + size) and (address < e["address"] + e["size"]):
+                    del self.manifest[k]
+                    self.valid.discard(k)
+            e = {"address": address, "size": size, "crc": None, "image": image}
+            self.manifest[key] = e
+            self.valid.add(key)
+            self.new.append(e)
+
+    # Decode an image with CMD_LOADIMAGE. When it is already in RAM_G the
+    # bitmap is set with CMD_SETBITMAP instead, unless OPT_NODL is given.
+    # Returns an object whose result() method gives the address, format,
+    # width and height of the image, waiting for the co-processor only
+    # if the image was loaded and the result has not been read yet.
+    def image(self, data, address, options = 0):
+        eve = self.eve
+        key = self.key("image", options, data)
+        e = self.lookup(key, address)
+        if e is None:
+            eve.CMD_LOADIMAGE(address, options)
+            eve.cc(align4(data))
+            image = eve.CMD_GETIMAGE_async()
+            end = eve.CMD_GETPTR_async()
+            self.pending.append((key, address, end, image))
+            return Later(lambda: (address,) + tuple(image.result()[1:4]))
+        if not (options & eve.OPT_NODL):
+            eve.CMD_SETBITMAP(address, *e["image"])
+        return Known((address,) + tuple(e["image"]))
+
+    # Decompress data with CMD_INFLATE. Returns an object whose result()
+    # method gives the size of the data.
+    def inflate(self, data, address):
+        eve = self.eve
+        key = self.key("inflate", 0, data)
+        e = self.lookup(key, address)
+        if e is None:
+            eve.CMD_INFLATE(address, 0)
+            eve.cc(align4(data))
+            end = eve.CMD_GETPTR_async()
+            self.pending.append((key, address, end, None))
+            return Later(lambda: end.result() - address)
+        return Known(e["size"])
+
+    # Write data to RAM_G. Returns the size of the data.
+    def write(self, data, address):
+        key = self.key("write", 0, data)
+        e = self.lookup(key, address)
+        if e is None:
+            data = align4(data)
+            self.eve.LIB_WriteDataToRAMG(data, address)
+            self.pending.append((key, address, len(data), None))
+            return len(data)
+        return e["size"]
+
+    # Read the sizes of the new uploads, then their CRCs, each with one
+    # wait for the co-processor, and write the manifest.
+    def save(self):
+        self.settle()
+        results = [(e, self.eve.CMD_MEMCRC_async(e["address"], e["size"])) for e in self.new]
+        for (e, r) in results:
+            e["crc"] = r.result()
+        self.new = []
+        with open(self.filename, "w") as f:
+            json.dump(self.manifest, f, indent = 1)
@@ -0,0 +1,127 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Use an EVE2 object from an asyncio application.
+# Commands are added to the command buffer from the event loop as usual.
+# Waiting for the co-processor and reading registers is done on a single
+# executor thread, so other coroutines run while the EVE device is busy.
+#
+#   eve = AsyncEVE2(bteve2.EVE2(connector))
+#   eve.CMD_DLSTART()
+#   ...
+#   eve.CMD_SWAP()
+#   await eve.finish()
+#
+#   eve.CMD_GETPTR(0)
+#   ptr = await eve.result()
+#
+#   ptr = await eve.CMD_GETPTR_async()
+#
+#   async for inputs in eve.touch_events():
+#       print(inputs.touch.x, inputs.touch.y)
+#
+# The command buffer is sent by the transfer thread of a pipeline, see
+# EVE2.start_pipeline(). finish() and result() wait for the commands
+# added before they were called. When both command buffers are in use,
+# the wait for a free one is made on the executor thread. A buffer filled
+# by adding commands is still sent from the event loop.
+
+class AsyncEVE2:
+
+    def __init__(self, eve, executor = None):
+        self.eve = eve
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "EVE")
+        self.executor = executor
+        if eve.pipeline is None:
+            eve.start_pipeline()
+
+    # Commands, registers and constants are those of the EVE2 object.
+    def __getattr__(self, name):
+        if name.endswith("_async"):
+            return self._awaitable(name)
+        return getattr(self.eve, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+    # Call a function on the executor thread.
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def _finished(self):
+        self.eve.sync()
+        self.eve.wait_finished()
+
+    def _resolve(self, results):
+        self._finished()
+        self.eve.read_results(results)
+
+    # Send the command buffer. The buffer is handed over on the event loop
+    # thread, after waiting on the executor for a spare buffer.
+    async def flush(self):
+        pipeline = self.eve.pipeline
+        while pipeline.spare.empty():
+            await self.run(pipeline.wait_spare)
+        self.eve.flush()
+
+    # Send the command buffer and wait for the co-processor to complete.
+    async def finish(self):
+        await self.flush()
+        await self.run(self._finished)
+
+    # Return the result field of the preceding command, as eve.result().
+    # The position of the result is taken when this is called, so commands
+    # added by other coroutines meanwhile do not change it.
+    async def result(self, fmt = "I", convert = None):
+        r = self.eve.result(fmt, convert)
+        await self.results()
+        return r.value
+
+    # Wait for the queued results, see eve.result(), and read them.
+    async def results(self):
+        eve = self.eve
+        if eve.results:
+            await self.flush()
+            results = eve.results
+            eve.results = ()
+            if results:
+                await self.run(self._resolve, results)
+
+    # The _async commands return a Result. Awaiting them here reads
+    # the value without blocking the event loop.
+    def _awaitable(self, name):
+        command = getattr(self.eve, name)
+        async def awaitable(*args):
+            r = command(*args)
+            await self.results()
+            return r.value
+        return awaitable
+
+    # Read the touch inputs.
+    async def inputs(self):
+        await self.finish()
+        return await self.run(self.eve.read_inputs)
+
+    # Poll the touch inputs and yield them while the screen is touched
+    # and once more when it is released.
+    async def touch_events(self, interval = 1 / 60):
+        while True:
+            inputs = await self.run(self.eve.read_inputs)
+            if inputs.state.touching or inputs.state.release:
+                yield inputs
+            await asyncio.sleep(interval)
+
+    # Send any remaining commands and stop the transfer and executor
+    # threads.
+    def close(self):
+        if self.eve.pipeline is not None:
+            self.eve.pipeline.stop()
+        self.executor.shutdown()
@@ -80,54 +80,63 @@ class connector():
     def rd32(self, a):
         return struct.unpack("I", self.rd(a, 4))[0]
 
-    @spilock
     def rd(self, a, nn):
+        r = bytearray(nn)
+        self.rd_into(a, memoryview(r))
+        return bytes(r)
+
+    # Read len(buf) bytes into buf, a writable memoryview, in place.
+    # The data after the READY byte is read straight into buf.
+    @spilock
+    def rd_into(self, a, buf):
         assert (a & 3) == 0
+        nn = len(buf)
         assert (nn & 3) == 0
         if nn == 0:
-            return b""
-        a1 = a + nn
-        r = b''
-        while a != a1:
-            # Timeout for a read is 7uS for BT82x.
-            # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
-            # Read a maximum of 4 bytes before the "0x01" that signifies data ready.
-            n = min(a1 - a, 4 + nn)
-            self.pcs.value = False
-            self.sp.write(self.addr(a))
-            def recv(n):
-                read_buffer = bytearray(n)
-                self.sp.readinto(read_buffer)
-                return read_buffer
-            bb = recv(4 + n)
-            if 1 in list(bb):
-                # Got READY byte in response
-                i = list(bb).index(1)
-                response = bb[i + 1:i + 1 + n]
-            else:
-                print(".")
-                # Poll for READY byte
-                while recv(1) == b'\x00':
-                    pass
-                response = b''
-            # Handle case of full response not received
-            if len(response) < n:
-                response += recv(n - len(response))
-            a += n
-            r += response
-            self.pcs.value = True
-        return r
+            return
+        # Timeout for a read is 7uS for BT82x.
+        # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
+        # Read a maximum of 4 bytes before the "0x01" that signifies data ready.
+        bb = bytearray(4)
+        self.pcs.value = False
+        self.sp.write(self.addr(a))
+        self.sp.readinto(bb)
+        if 1 in list(bb):
+            # Got READY byte in response
+            i = list(bb).index(1)
+            got = min(nn, 3 - i)
+            buf[:got] = bb[i + 1:i + 1 + got]
+        else:
+            print(".")
+            # Poll for READY byte
+            b1 = bytearray(1)
+            self.sp.readinto(b1)
+            while b1[0] == 0:
+                self.sp.readinto(b1)
+            got = 0
+        # Read the rest of the response into place
+        if got < nn:
+            self.sp.readinto(buf, start = got, end = nn)
+        self.pcs.value = True
 
-    @spilock
     def wr(self, a, s, inc=True):
+        self.writev(a, [s], inc)
+
+    # Write a list of buffers to consecutive addresses, as if they were
+    # joined. Each buffer is written straight from the caller.
+    @spilock
+    def writev(self, a, bufs, inc=True):
         _ = inc
         assert (a & 3) == 0
-        t = len(s)
+        t = 0
+        for b in bufs:
+            t += len(b)
         assert (t & 3) == 0
 
         self.pcs.value = False
         self.sp.write(self.addr(a | (1 << 31)))
-        self.sp.write(s)
+        for b in bufs:
+            self.sp.write(b)
         self.pcs.value = True
 
     def cs(self, v):
@@ -0,0 +1,262 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import struct
+from sys import implementation
+
+# Specification of the display list and coprocessor commands.
+# The encoder methods of EVE2 are made from these tables by the functions
+# at the end of this file. The extension patch files are generated
+# separately by extensionutil.py and do not use them.
+
+# Display list commands.
+# Each entry is the camel case name used in _EVE, the name used in EVE2,
+# the command word and the fields of the command. A field is the name of
+# the parameter, the mask and the shift of the value in the command word.
+# Where a field has a fourth value then the parameter is shifted right by
+# that number of bits before it is masked. The last item in an entry is
+# a tuple of default values for the trailing parameters.
+DISPLAY_LIST = (
+    ('AlphaFunc',        'ALPHA_FUNC',         9 << 24,    (('func', 7, 8), ('ref', 255, 0)), ()),
+    ('Begin',            'BEGIN',              31 << 24,   (('prim', 15, 0),), ()),
+    ('BitmapExtFormat',  'BITMAP_EXT_FORMAT',  46 << 24,   (('fmt', 65535, 0),), ()),
+    ('BitmapHandle',     'BITMAP_HANDLE',      5 << 24,    (('handle', 63, 0),), ()),
+    ('BitmapLayout',     'BITMAP_LAYOUT',      7 << 24,    (('format', 31, 19), ('linestride', 1023, 9), ('height', 511, 0)), ()),
+    ('BitmapLayoutH',    'BITMAP_LAYOUT_H',    40 << 24,   (('linestride', 3, 2), ('height', 3, 0)), ()),
+    ('BitmapSize',       'BITMAP_SIZE',        8 << 24,    (('filter', 1, 20), ('wrapx', 1, 19), ('wrapy', 1, 18), ('width', 511, 9), ('height', 511, 0)), ()),
+    ('BitmapSizeH',      'BITMAP_SIZE_H',      41 << 24,   (('width', 3, 2), ('height', 3, 0)), ()),
+    ('BitmapSource',     'BITMAP_SOURCE',      1 << 24,    (('addr', 0xffffff, 0),), ()),
+    ('BitmapSourceH',    'BITMAP_SOURCE_H',    49 << 24,   (('addr', 0xff, 0),), ()),
+    ('BitmapSwizzle',    'BITMAP_SWIZZLE',     47 << 24,   (('r', 7, 9), ('g', 7, 6), ('b', 7, 3), ('a', 7, 0)), ()),
+    ('BitmapTransformA', 'BITMAP_TRANSFORM_A', 21 << 24,   (('p', 1, 17), ('a', 131071, 0)), ()),
+    ('BitmapTransformB', 'BITMAP_TRANSFORM_B', 22 << 24,   (('p', 1, 17), ('b', 131071, 0)), ()),
+    ('BitmapTransformC', 'BITMAP_TRANSFORM_C', 23 << 24,   (('c', 16777215, 0),), ()),
+    ('BitmapTransformD', 'BITMAP_TRANSFORM_D', 24 << 24,   (('p', 1, 17), ('d', 131071, 0)), ()),
+    ('BitmapTransformE', 'BITMAP_TRANSFORM_E', 25 << 24,   (('p', 1, 17), ('e', 131071, 0)), ()),
+    ('BitmapTransformF', 'BITMAP_TRANSFORM_F', 26 << 24,   (('f', 16777215, 0),), ()),
+    ('BitmapZorder',     'BITMAP_ZORDER',      51 << 24,   (('o', 255, 0),), ()),
+    ('BlendFunc',        'BLEND_FUNC',         11 << 24,   (('src', 7, 3), ('dst', 7, 0)), ()),
+    ('Call',             'CALL',               29 << 24,   (('dest', 65535, 0),), ()),
+    ('Cell',             'CELL',               6 << 24,    (('cell', 127, 0),), ()),
+    ('ClearColorA',      'CLEAR_COLOR_A',      15 << 24,   (('alpha', 255, 0),), ()),
+    ('ClearColorRGB',    'CLEAR_COLOR_RGB',    2 << 24,    (('red', 255, 16), ('green', 255, 8), ('blue', 255, 0)), ()),
+    ('Clear',            'CLEAR',              38 << 24,   (('c', 1, 2), ('s', 1, 1), ('t', 1, 0)), (1, 1, 1)),
+    ('ClearStencil',     'CLEAR_STENCIL',      17 << 24,   (('s', 255, 0),), ()),
+    ('ClearTag',         'CLEAR_TAG',          18 << 24,   (('s', 0xffffff, 0),), ()),
+    ('ColorA',           'COLOR_A',            16 << 24,   (('alpha', 255, 0),), ()),
+    ('ColorMask',        'COLOR_MASK',         32 << 24,   (('r', 1, 3), ('g', 1, 2), ('b', 1, 1), ('a', 1, 0)), ()),
+    ('ColorRGB',         'COLOR_RGB',          4 << 24,    (('red', 255, 16), ('green', 255, 8), ('blue', 255, 0)), ()),
+    ('Display',          'DISPLAY',            0 << 24,    (), ()),
+    ('End',              'END',                33 << 24,   (), ()),
+    ('Jump',             'JUMP',               30 << 24,   (('dest', 65535, 0),), ()),
+    ('LineWidth',        'LINE_WIDTH',         14 << 24,   (('width', 4095, 0),), ()),
+    ('Macro',            'MACRO',              37 << 24,   (('m', 1, 0),), ()),
+    ('Nop',              'NOP',                45 << 24,   (), ()),
+    ('PaletteSource',    'PALETTE_SOURCE',     42 << 24,   (('addr', 0xffffff, 0),), ()),
+    ('PaletteSourceH',   'PALETTE_SOURCE_H',   50 << 24,   (('addr', 255, 0, 24),), ()),
+    ('PointSize',        'POINT_SIZE',         13 << 24,   (('size', 8191, 0),), ()),
+    ('Region',           'REGION',             52 << 24,   (('y', 63, 18), ('h', 63, 12), ('dest', 4095, 0)), ()),
+    ('RestoreContext',   'RESTORE_CONTEXT',    35 << 24,   (), ()),
+    ('Return',           'RETURN',             36 << 24,   (), ()),
+    ('SaveContext',      'SAVE_CONTEXT',       34 << 24,   (), ()),
+    ('ScissorSize',      'SCISSOR_SIZE',       28 << 24,   (('width', 4095, 12), ('height', 4095, 0)), ()),
+    ('ScissorXY',        'SCISSOR_XY',         27 << 24,   (('x', 2047, 11), ('y', 2047, 0)), ()),
+    ('StencilFunc',      'STENCIL_FUNC',       10 << 24,   (('func', 7, 16), ('ref', 255, 8), ('mask', 255, 0)), ()),
+    ('StencilMask',      'STENCIL_MASK',       19 << 24,   (('mask', 255, 0),), ()),
+    ('StencilOp',        'STENCIL_OP',         12 << 24,   (('sfail', 7, 3), ('spass', 7, 0)), ()),
+    ('TagMask',          'TAG_MASK',           20 << 24,   (('mask', 1, 0),), ()),
+    ('Tag',              'TAG',                3 << 24,    (('s', 0xffffff, 0),), ()),
+    ('VertexFormat',     'VERTEX_FORMAT',      39 << 24,   (('frac', 7, 0),), ()),
+    ('Vertex2f',         'VERTEX2F',           1 << 30,    (('x', 32767, 15), ('y', 32767, 0)), ()),
+    ('Vertex2ii',        'VERTEX2II',          2 << 30,    (('x', 511, 21), ('y', 511, 12), ('handle', 31, 7), ('cell', 127, 0)), (0, 0)),
+    ('VertexTranslateX', 'VERTEX_TRANSLATE_X', 43 << 24,   (('x', 131071, 0),), ()),
+    ('VertexTranslateY', 'VERTEX_TRANSLATE_Y', 44 << 24,   (('y', 131071, 0),), ()),
+)
+
+# Coprocessor commands which only have numeric parameters.
+# Each entry is the command name, the opcode and the struct format of the
+# parameters. Reserved fields at the end of a command are padded with "x".
+COPROCESSOR = (
+    ('CMD_ANIMDRAW',         0x4f, 'i'),               # CMD_ANIMDRAW(int32_t ch)
+    ('CMD_ANIMFRAME',        0x5e, 'hhII'),            # CMD_ANIMFRAME(int16_t x, int16_t y, uint32_t aoptr, uint32_t frame)
+    ('CMD_ANIMSTART',        0x5f, 'iII'),             # CMD_ANIMSTART(int32_t ch, uint32_t aoptr, uint32_t loop)
+    ('CMD_ANIMSTOP',         0x4d, 'i'),               # CMD_ANIMSTOP(int32_t ch)
+    ('CMD_ANIMXY',           0x4e, 'ihh'),             # CMD_ANIMXY(int32_t ch, int16_t x, int16_t y)
+    ('CMD_APPEND',           0x1c, 'II'),              # CMD_APPEND(uint32_t ptr, uint32_t num)
+    ('CMD_APPENDF',          0x52, 'II'),              # CMD_APPENDF(uint32_t ptr, uint32_t num)
+    ('CMD_ARC',              0x87, 'hhHHHH'),          # CMD_ARC(int16_t x, int16_t y, uint16_t r0, uint16_t r1, uint16_t a0, uint16_t a1)
+    ('CMD_BGCOLOR',          0x07, 'I'),               # CMD_BGCOLOR(uint32_t c)
+    ('CMD_BITMAP_TRANSFORM', 0x1f, 'iiiiiiiiiiiiHxx'), # CMD_BITMAP_TRANSFORM(int32_t x0, int32_t y0, int32_t x1, int32_t y1, int32_t x2, int32_t y2, int32_t tx0, int32_t ty0, int32_t tx1, int32_t ty1, int32_t tx2, int32_t ty2, uint16_t result)
+    ('CMD_CALIBRATE',        0x13, 'I'),               # CMD_CALIBRATE(uint32_t result)
+    ('CMD_CALIBRATESUB',     0x56, 'HHHHI'),           # CMD_CALIBRATESUB(uint16_t x, uint16_t y, uint16_t w, uint16_t h, uint32_t result)
+    ('CMD_CALLLIST',         0x5b, 'I'),               # CMD_CALLLIST(uint32_t a)
+    ('CMD_CGRADIENT',        0x8a, 'IhhhhII'),         # CMD_CGRADIENT(uint32_t shape, int16_t x, int16_t y, int16_t w, int16_t h, uint32_t rgb0, uint32_t rgb1)
+    ('CMD_CLOCK',            0x12, 'hhhHHHHH'),        # CMD_CLOCK(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t h, uint16_t m, uint16_t s, uint16_t ms)
+    ('CMD_COLDSTART',        0x2e, ''),                # CMD_COLDSTART()
+    ('CMD_COPYLIST',         0x88, 'I'),               # CMD_COPYLIST(uint32_t dst)
+    ('CMD_DDRSHUTDOWN',      0x65, ''),                # CMD_DDRSHUTDOWN()
+    ('CMD_DDRSTARTUP',       0x66, ''),                # CMD_DDRSTARTUP()
+    ('CMD_DIAL',             0x29, 'hhhHI'),           # CMD_DIAL(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t val)
+    ('CMD_ENABLEREGION',     0x7e, 'I'),               # CMD_ENABLEREGION(uint32_t en)
+    ('CMD_ENDLIST',          0x5d, ''),                # CMD_ENDLIST()
+    ('CMD_FENCE',            0x68, ''),                # CMD_FENCE()
+    ('CMD_FGCOLOR',          0x08, 'I'),               # CMD_FGCOLOR(uint32_t c)
+    ('CMD_FILLWIDTH',        0x51, 'I'),               # CMD_FILLWIDTH(uint32_t s)
+    ('CMD_FLASHATTACH',      0x43, ''),                # CMD_FLASHATTACH()
+    ('CMD_FLASHDETACH',      0x42, ''),                # CMD_FLASHDETACH()
+    ('CMD_FLASHERASE',       0x3e, ''),                # CMD_FLASHERASE()
+    ('CMD_FLASHFAST',        0x44, 'I'),               # CMD_FLASHFAST(uint32_t result)
+    ('CMD_FLASHPROGRAM',     0x64, 'III'),             # CMD_FLASHPROGRAM(uint32_t dest, uint32_t src, uint32_t num)
+    ('CMD_FLASHREAD',        0x40, 'III'),             # CMD_FLASHREAD(uint32_t dest, uint32_t src, uint32_t num)
+    ('CMD_FLASHSOURCE',      0x48, 'I'),               # CMD_FLASHSOURCE(uint32_t ptr)
+    ('CMD_FLASHSPIDESEL',    0x45, ''),                # CMD_FLASHSPIDESEL()
+    ('CMD_FLASHSPIRX',       0x47, 'II'),              # CMD_FLASHSPIRX(uint32_t ptr, uint32_t num)
+    ('CMD_FLASHSPITX',       0x46, 'I'),               # CMD_FLASHSPITX(uint32_t num!)
+    ('CMD_FLASHUPDATE',      0x41, 'III'),             # CMD_FLASHUPDATE(uint32_t dest, uint32_t src, uint32_t num)
+    ('CMD_FLASHWRITE',       0x3f, 'II'),              # CMD_FLASHWRITE(uint32_t ptr, uint32_t num!)
+    ('CMD_FSOPTIONS',        0x6d, 'I'),               # CMD_FSOPTIONS(uint32_t options)
+    ('CMD_GAUGE',            0x11, 'hhhHHHHH'),        # CMD_GAUGE(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t major, uint16_t minor, uint16_t val, uint16_t range)
+    ('CMD_GETIMAGE',         0x58, 'IIIII'),           # CMD_GETIMAGE(uint32_t source, uint32_t fmt, uint32_t w, uint32_t h, uint32_t palette)
+    ('CMD_GETMATRIX',        0x2f, 'iiiiii'),          # CMD_GETMATRIX(int32_t a, int32_t b, int32_t c, int32_t d, int32_t e, int32_t f)
+    ('CMD_GETPROPS',         0x22, 'III'),             # CMD_GETPROPS(uint32_t ptr, uint32_t w, uint32_t h)
+    ('CMD_GETPTR',           0x20, 'I'),               # CMD_GETPTR(uint32_t result)
+    ('CMD_GLOW',             0x8b, 'hhhh'),            # CMD_GLOW(int16_t x, int16_t y, int16_t w, int16_t h)
+    ('CMD_GRADCOLOR',        0x30, 'I'),               # CMD_GRADCOLOR(uint32_t c)
+    ('CMD_GRADIENT',         0x09, 'hhIhhI'),          # CMD_GRADIENT(int16_t x0, int16_t y0, uint32_t rgb0, int16_t x1, int16_t y1, uint32_t rgb1)
+    ('CMD_GRADIENTA',        0x50, 'hhIhhI'),          # CMD_GRADIENTA(int16_t x0, int16_t y0, uint32_t argb0, int16_t x1, int16_t y1, uint32_t argb1)
+    ('CMD_GRAPHICSFINISH',   0x6b, ''),                # CMD_GRAPHICSFINISH()
+    ('CMD_I2SSTARTUP',       0x69, 'I'),               # CMD_I2SSTARTUP(uint32_t freq)
+    ('CMD_INFLATE',          0x4a, 'II'),              # CMD_INFLATE(uint32_t ptr, uint32_t options!)
+    ('CMD_INTERRUPT',        0x02, 'I'),               # CMD_INTERRUPT(uint32_t ms)
+    ('CMD_LOADASSET',        0x81, 'II'),              # CMD_LOADASSET(uint32_t ptr, uint32_t options!)
+    ('CMD_LOADIDENTITY',     0x23, ''),                # CMD_LOADIDENTITY()
+    ('CMD_LOADIMAGE',        0x21, 'II'),              # CMD_LOADIMAGE(uint32_t ptr, uint32_t options!)
+    ('CMD_LOADWAV',          0x85, 'II'),              # CMD_LOADWAV(uint32_t dst, uint32_t options!)
+    ('CMD_LOGO',             0x2d, ''),                # CMD_LOGO()
+    ('CMD_MEDIAFIFO',        0x34, 'II'),              # CMD_MEDIAFIFO(uint32_t ptr, uint32_t size)
+    ('CMD_MEMCPY',           0x1b, 'III'),             # CMD_MEMCPY(uint32_t dest, uint32_t src, uint32_t num)
+    ('CMD_MEMCRC',           0x16, 'III'),             # CMD_MEMCRC(uint32_t ptr, uint32_t num, uint32_t result)
+    ('CMD_MEMSET',           0x19, 'III'),             # CMD_MEMSET(uint32_t ptr, uint32_t value, uint32_t num)
+    ('CMD_MEMWRITE',         0x18, 'II'),              # CMD_MEMWRITE(uint32_t ptr, uint32_t num!)
+    ('CMD_MEMZERO',          0x1a, 'II'),              # CMD_MEMZERO(uint32_t ptr, uint32_t num)
+    ('CMD_NEWLIST',          0x5c, 'I'),               # CMD_NEWLIST(uint32_t a)
+    ('CMD_NOP',              0x53, ''),                # CMD_NOP()
+    ('CMD_NUMBER',           0x2a, 'hhhHi'),           # CMD_NUMBER(int16_t x, int16_t y, int16_t font, uint16_t options, int32_t n)
+    ('CMD_PLAYVIDEO',        0x35, 'I'),               # CMD_PLAYVIDEO(uint32_t options!)
+    ('CMD_PLAYWAV',          0x79, 'I'),               # CMD_PLAYWAV(uint32_t options!)
+    ('CMD_PROGRESS',         0x0d, 'hhhhHHHxx'),       # CMD_PROGRESS(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t range)
+    ('CMD_REGREAD',          0x17, 'II'),              # CMD_REGREAD(uint32_t ptr, uint32_t result)
+    ('CMD_REGWRITE',         0x86, 'II'),              # CMD_REGWRITE(uint32_t dst, uint32_t value)
+    ('CMD_RENDERTARGET',     0x8d, 'IHhhxx'),          # CMD_RENDERTARGET(uint32_t a, uint16_t fmt, int16_t w, int16_t h)
+    ('CMD_RESETFONTS',       0x4c, ''),                # CMD_RESETFONTS()
+    ('CMD_RESTORECONTEXT',   0x7d, ''),                # CMD_RESTORECONTEXT()
+    ('CMD_RESULT',           0x89, 'I'),               # CMD_RESULT(uint32_t dst)
+    ('CMD_RETURN',           0x5a, ''),                # CMD_RETURN()
+    ('CMD_ROMFONT',          0x39, 'II'),              # CMD_ROMFONT(uint32_t font, uint32_t romslot)
+    ('CMD_ROTATE',           0x26, 'i'),               # CMD_ROTATE(int32_t a)
+    ('CMD_ROTATEAROUND',     0x4b, 'iiii'),            # CMD_ROTATEAROUND(int32_t x, int32_t y, int32_t a, int32_t s)
+    ('CMD_RUNANIM',          0x60, 'Ii'),              # CMD_RUNANIM(uint32_t waitmask, uint32_t play)
+    ('CMD_SAVECONTEXT',      0x7c, ''),                # CMD_SAVECONTEXT()
+    ('CMD_SCALE',            0x25, 'ii'),              # CMD_SCALE(int32_t sx, int32_t sy)
+    ('CMD_SCREENSAVER',      0x2b, ''),                # CMD_SCREENSAVER()
+    ('CMD_SCROLLBAR',        0x0f, 'hhhhHHHH'),        # CMD_SCROLLBAR(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t size, uint16_t range)
+    ('CMD_SDATTACH',         0x6e, 'II'),              # CMD_SDATTACH(uint32_t options, uint32_t result)
+    ('CMD_SDBLOCKREAD',      0x6f, 'IIII'),            # CMD_SDBLOCKREAD(uint32_t dst, uint32_t src, uint32_t count, uint32_t result)
+    ('CMD_SETBASE',          0x33, 'I'),               # CMD_SETBASE(uint32_t b)
+    ('CMD_SETBITMAP',        0x3d, 'IHHHxx'),          # CMD_SETBITMAP(uint32_t source, uint16_t fmt, uint16_t w, uint16_t h)
+    ('CMD_SETFONT',          0x36, 'III'),             # CMD_SETFONT(uint32_t font, uint32_t ptr, uint32_t firstchar)
+    ('CMD_SETMATRIX',        0x27, ''),                # CMD_SETMATRIX()
+    ('CMD_SETROTATE',        0x31, 'I'),               # CMD_SETROTATE(uint32_t r)
+    ('CMD_SETSCRATCH',       0x37, 'I'),               # CMD_SETSCRATCH(uint32_t handle)
+    ('CMD_SKETCH',           0x2c, 'hhHHIHxx'),        # CMD_SKETCH(int16_t x, int16_t y, uint16_t w, uint16_t h, uint32_t ptr, uint16_t format)
+    ('CMD_SKIPCOND',         0x8c, 'IIIII'),           # CMD_SKIPCOND(uint32_t a, uint32_t func, uint32_t ref, uint32_t mask, uint32_t num)
+    ('CMD_SLIDER',           0x0e, 'hhhhHHHxx'),       # CMD_SLIDER(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t range)
+    ('CMD_SNAPSHOT',         0x1d, 'I'),               # CMD_SNAPSHOT(uint32_t ptr)
+    ('CMD_SPINNER',          0x14, 'hhHH'),            # CMD_SPINNER(int16_t x, int16_t y, uint16_t style, uint16_t scale)
+    ('CMD_STOP',             0x15, ''),                # CMD_STOP()
+    ('CMD_SWAP',             0x01, ''),                # CMD_SWAP()
+    ('CMD_SYNC',             0x3c, ''),                # CMD_SYNC()
+    ('CMD_TESTCARD',         0x57, ''),                # CMD_TESTCARD()
+    ('CMD_TRACK',            0x28, 'hhhhhxx'),         # CMD_TRACK(int16_t x, int16_t y, int16_t w, int16_t h, int16_t tag)
+    ('CMD_TRANSLATE',        0x24, 'ii'),              # CMD_TRANSLATE(int32_t tx, int32_t ty)
+    ('CMD_VIDEOFRAME',       0x3b, 'II'),              # CMD_VIDEOFRAME(uint32_t dst, uint32_t ptr)
+    ('CMD_VIDEOSTART',       0x3a, 'I'),               # CMD_VIDEOSTART(uint32_t options)
+    ('CMD_WAIT',             0x59, 'I'),               # CMD_WAIT(uint32_t us)
+    ('CMD_WAITCHANGE',       0x67, 'I'),               # CMD_WAITCHANGE(uint32_t a)
+    ('CMD_WAITCOND',         0x78, 'IIII'),            # CMD_WAITCOND(uint32_t a, uint32_t func, uint32_t ref, uint32_t mask)
+    ('CMD_WATCHDOG',         0x83, 'I'),               # CMD_WATCHDOG(uint32_t init_val)
+
+    # Extension commands
+
+    ('CMD_LOADPATCH',        0x82, 'I'),               # CMD_LOADPATCH(uint32_t options)
+)
+
+# Make the source of the encoder for a display list command. Parameters
+# which are not integers are converted with int(). The command word is
+# packed straight into the command buffer when it stays below the flush
+# threshold limit, otherwise it is sent with c4().
+def display_list_source(name, word, fields, defaults, limit):
+    params = [ f[0] for f in fields ]
+    for i, d in enumerate(defaults, len(params) - len(defaults)):
+        params[i] = "%s = %r" % (params[i], d)
+    lines = [ "def %s(self%s):" % (name, "".join(", " + p for p in params)) ]
+    if fields:
+        lines.append("    if not (%s):" % " and ".join("type(%s) is int" % f[0] for f in fields))
+        lines.append("        %s = %s" % (", ".join(f[0] for f in fields), ", ".join("int(%s)" % f[0] for f in fields)))
+    value = [ "0x%08x" % word ]
+    for f in fields:
+        arg = f[0]
+        if len(f) > 3:
+            arg = "(%s >> %d)" % (arg, f[3])
+        if f[2]:
+            value.append("((%s & %d) << %d)" % (arg, f[1], f[2]))
+        else:
+            value.append("(%s & %d)" % (arg, f[1]))
+    lines += [
+        "    v = %s" % " | ".join(value),
+        "    p = self.bufptr",
+        "    if p < %d:" % (limit - 4),
+        "        _pack_into(self.buf, p, v)",
+        "        self.bufptr = p + 4",
+        "    else:",
+        "        self.c4(v)",
+    ]
+    return "\n".join(lines) + "\n"
+
+_WORD = struct.Struct("<I")
+
+# Make the encoder method for a display list command.
+def display_list(name, word, fields, defaults, limit):
+    namespace = { "_pack_into": _WORD.pack_into }
+    exec(display_list_source(name, word, fields, defaults, limit), namespace)
+    return namespace[name]
+
+# Make a coprocessor command from the opcode and the struct format of the
+# parameters, for use as a method of EVE2. Unlike the functions in the
+# patch files made by extensionutil.py, it must be given exactly the
+# parameters of the format, extra parameters are not ignored. The
+# parameters are padded to a multiple of 4 bytes. On CPython the opcode
+# and parameters are packed into the command buffer with one precompiled
+# struct.Struct. The native cmd() of CircuitPython is given explicit zero
+# parameters instead of pad bytes.
+def coprocessor(op, fmt):
+    fmt += "x" * (-struct.calcsize("I" + fmt) & 3)
+    word = 0xffffff00 | op
+    if implementation.name == "circuitpython":
+        pads = len(fmt) - len(fmt.rstrip("x"))
+        fmt = fmt.rstrip("x") + "H" * (pads // 2) + "B" * (pads % 2)
+        zeros = (0,) * (pads // 2 + pads % 2)
+    if implementation.name != "circuitpython":
+        st = struct.Struct("I" + fmt)
+        if fmt:
+            def command(self, *args):
+                self.cmdpack(st, word, args)
+        else:
+            def command(self, *args):
+                self.cmdpack(st, word, ())
+    elif fmt:
+        def command(self, *args):
+            self.cmd(op, fmt, tuple( int(arg) for arg in args ) + zeros)
+    else:
+        def command(self, *args):
+            self.cmd0(op)
+    return command
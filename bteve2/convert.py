@@ -0,0 +1,154 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import numpy as np
+
+from .eve import EVE2
+
+# Convert PIL images to EVE bitmap formats.
+# The image is converted in stripes of rows so that the working arrays are
+# only a few times the size of one stripe. Each row starts on a byte
+# boundary, see stride().
+#
+#   im = Image.open("logo.png")
+#   data = convert(im, eve.FORMAT_ARGB4, dither = True)
+#
+# Paletted formats give the index data and the palette together from
+# convert_paletted(), which quantizes the image once.
+#
+#   (data, pal) = convert_paletted(im, eve.FORMAT_PALETTED565)
+
+# Bits of (alpha, red, green, blue) for each format, and the PIL mode the
+# image is converted to. Luminance is in the blue bits.
+FORMATS = {
+    EVE2.FORMAT_ARGB1555 :  ((1, 5, 5, 5), "RGBA"),
+    EVE2.FORMAT_ARGB2 :     ((2, 2, 2, 2), "RGBA"),
+    EVE2.FORMAT_ARGB4 :     ((4, 4, 4, 4), "RGBA"),
+    EVE2.FORMAT_ARGB8 :     ((8, 8, 8, 8), "RGBA"),
+    EVE2.FORMAT_RGB332 :    ((0, 3, 3, 2), "RGB"),
+    EVE2.FORMAT_RGB565 :    ((0, 5, 6, 5), "RGB"),
+    EVE2.FORMAT_RGB8 :      ((0, 8, 8, 8), "RGB"),
+    EVE2.FORMAT_L1 :        ((0, 0, 0, 1), "L"),
+    EVE2.FORMAT_L2 :        ((0, 0, 0, 2), "L"),
+    EVE2.FORMAT_L4 :        ((0, 0, 0, 4), "L"),
+    EVE2.FORMAT_L8 :        ((0, 0, 0, 8), "L"),
+    EVE2.FORMAT_LA1 :       ((1, 0, 0, 1), "LA"),
+    EVE2.FORMAT_LA2 :       ((2, 0, 0, 2), "LA"),
+    EVE2.FORMAT_LA4 :       ((4, 0, 0, 4), "LA"),
+    EVE2.FORMAT_LA8 :       ((8, 0, 0, 8), "LA"),
+}
+
+# Paletted formats have 8-bit indexes and a palette in another format.
+PALETTED = {
+    EVE2.FORMAT_PALETTED8 :     EVE2.FORMAT_ARGB8,
+    EVE2.FORMAT_PALETTEDARGB8 : EVE2.FORMAT_ARGB8,
+    EVE2.FORMAT_PALETTED565 :   EVE2.FORMAT_RGB565,
+    EVE2.FORMAT_PALETTED4444 :  EVE2.FORMAT_ARGB4,
+}
+
+# Amount of dither added to a channel of each number of bits, times the
+# 2x2 ordered dither matrix.
+_DITHER = {1: 32, 2: 16, 3: 8, 4: 4, 5: 2, 6: 1}
+_MATRIX = np.array([[0, 2], [3, 1]], np.uint16)
+
+def bpp(fmt):
+    if fmt in PALETTED:
+        return 8
+    return sum(FORMATS[fmt][0])
+
+# Bytes in each row of a bitmap.
+def stride(fmt, w):
+    return (w * bpp(fmt) + 7) // 8
+
+# Return the paletted image used for the index data and the palette.
+def quantize(im):
+    if im.mode == "P":
+        return im
+    return im.convert("RGBA").quantize(256)
+
+# Pack the channels into a word for each pixel.
+# The channels are (blue, green, red, alpha) arrays of rows and columns.
+# y is the row of the image for the dither pattern.
+def pack(channels, sizes, y = 0, dither = False):
+    word = np.zeros(channels[0].shape, np.uint32)
+    if dither:
+        (rows, w) = word.shape
+        d = np.tile(_MATRIX, ((rows + 3) // 2, (w + 1) // 2))[(y & 1):(y & 1) + rows, :w]
+    p = 0
+    for (c, s) in zip(channels, sizes[::-1]):
+        if s:
+            if dither and s in _DITHER:
+                c = np.minimum(255, c.astype(np.uint16) + _DITHER[s] * d)
+            word |= (c >> (8 - s)).astype(np.uint32) << p
+            p += s
+    return word
+
+# Pack words of bits each into bytes. Pixels smaller than a byte are
+# packed with the first pixel in the highest bits.
+def tobytes(word, bits):
+    if bits == 1:
+        return np.packbits(word.astype(np.uint8), axis = 1).tobytes()
+    if bits < 8:
+        (rows, w) = word.shape
+        k = 8 // bits
+        if w % k:
+            word = np.concatenate((word, np.zeros((rows, k - w % k), np.uint32)), axis = 1)
+        word = word.reshape((rows, -1, k)).astype(np.uint8)
+        b = np.zeros(word.shape[:2], np.uint8)
+        for j in range(k):
+            b |= word[:, :, j] << (8 - bits * (j + 1))
+        return b.tobytes()
+    if bits == 24:
+        return word.astype("<u4").view(np.uint8).reshape(word.shape + (4,))[:, :, :3].tobytes()
+    return word.astype({8: "<u1", 16: "<u2", 32: "<u4"}[bits]).tobytes()
+
+# The 8-bit indexes of a paletted image, stripe rows at a time.
+def indexes(im, stripe = 64):
+    (w, h) = im.size
+    out = bytearray(w * h)
+    for y in range(0, h, stripe):
+        rows = np.asarray(im.crop((0, y, w, min(h, y + stripe))), np.uint8)
+        out[y * w:y * w + rows.size] = rows.tobytes()
+    return bytes(out)
+
+# Convert an image to the bitmap data for a format. The image is
+# converted stripe rows at a time. For paletted formats this is the index
+# data only, see convert_paletted().
+def convert(im, fmt, dither = False, stripe = 64):
+    (w, h) = im.size
+    if fmt in PALETTED:
+        return indexes(quantize(im), stripe)
+
+    (sizes, mode) = FORMATS[fmt]
+    bits = sum(sizes)
+    n = stride(fmt, w)
+    out = bytearray(n * h)
+    for y in range(0, h, stripe):
+        part = im.crop((0, y, w, min(h, y + stripe)))
+        if part.mode != mode:
+            part = part.convert(mode)
+        a = np.asarray(part, np.uint8)
+        if mode == "L":
+            channels = (a,)
+        elif mode == "LA":
+            channels = (a[:, :, 0], None, None, a[:, :, 1])
+        elif mode == "RGB":
+            channels = (a[:, :, 2], a[:, :, 1], a[:, :, 0])
+        else:
+            channels = (a[:, :, 2], a[:, :, 1], a[:, :, 0], a[:, :, 3])
+        word = pack(channels, sizes, y, dither)
+        out[y * n:y * n + n * word.shape[0]] = tobytes(word, bits)
+    return bytes(out)
+
+# Return the index data and the palette of an image for a paletted
+# format, quantizing it once.
+def convert_paletted(im, fmt, stripe = 64):
+    im = quantize(im)
+    return (indexes(im, stripe), palette(im, fmt))
+
+# Return the palette of an image for a paletted format.
+def palette(im, fmt):
+    im = quantize(im)
+    rgba = np.frombuffer(bytes(im.getpalette("RGBA")), np.uint8).reshape((1, -1, 4))
+    sizes = FORMATS[PALETTED[fmt]][0]
+    channels = (rgba[:, :, 2], rgba[:, :, 1], rgba[:, :, 0], rgba[:, :, 3])
+    return tobytes(pack(channels, sizes), sum(sizes))
@@ -6,10 +6,21 @@ import struct
 import time
 
 import bteve2 as eve
+from bteve2.eve import chunks
 
 class connector():
     FREQUENCY = 72_000_000      # system clock frequency, in Hz
 
+    # How to wait for read data:
+    #   "spin"  - poll FT_GetQueueStatus until the data has arrived
+    #   "block" - let FT_Read wait, up to READ_TIMEOUT
+    #   "event" - sleep on an event set by FT_SetEventNotification,
+    #             on Windows only, elsewhere "block" is used
+    # "block" and "event" must be chosen before the connector is made.
+    WAIT = "spin"
+    READ_TIMEOUT = 5000         # ms
+    FT_EVENT_RXCHAR = 1
+
     def __init__(self):
         print("Initialise FT232H interface")
 
@@ -78,7 +89,25 @@ class connector():
 
         time.sleep(0.050)   # wait for device
 
-        self.s = ctypes.create_string_buffer(65536)
+        # Reusable receive buffer, shared with ctypes without a copy.
+        self.s = bytearray(65536)
+        # Chip select, write command, address, data and chip deselect.
+        self.frame = bytearray(3 + 3 + 4 + 64000 + 3)
+
+        self.wait = self.WAIT
+        if self.wait == "event":
+            if sys.platform.startswith('win'):
+                self.kernel32 = ctypes.windll.kernel32
+                self.event = self.kernel32.CreateEventW(None, False, False, None)
+                self.check(self.d2xx.FT_SetEventNotification(self.ftHandle, self.FT_EVENT_RXCHAR, ctypes.c_void_p(self.event)))
+            else:
+                self.wait = "block"
+        if self.wait == "block":
+            self.check(self.d2xx.FT_SetTimeouts(self.ftHandle, self.READ_TIMEOUT, 5000))
+        # Bytes read, and the CPU time of this thread spent waiting for
+        # and reading them, see report().
+        self.rxbytes = 0
+        self.rxcpu = 0.0
 
         # OK, now device is in MPSSE mode, so can 
         # use AN_108 system
@@ -86,10 +115,9 @@ class connector():
         self.silent(self.bseq(0x84))                      # Loopback enable
         self.raw_write(self.bseq(0xab))                       # Send bogus command 0xab
 
-        while self.npending() < 2:
-            pass
-        rd = self.raw_read(self.npending())
-        if rd != [b'\xfa', b'\xab']:
+        self.wait_pending(2)
+        rd = bytes(self.raw_read(max(2, self.npending())))
+        if rd != b'\xfa\xab':
             print("Error in synchronizing the MPSSE:")
             print(rd)
             assert 0
@@ -137,21 +165,35 @@ class connector():
         dwNumBytesToRead = ctypes.c_uint()
         self.check(self.d2xx.FT_GetQueueStatus(self.ftHandle, ctypes.byref(dwNumBytesToRead)))
         return dwNumBytesToRead.value
+    # Read n bytes into the receive buffer and return a memoryview onto
+    # them. The view is only valid until the next read.
     def raw_read(self, n):
+        v = memoryview(self.s)[:n]
+        self.raw_read_into(v)
+        return v
+    # Read len(buf) bytes straight into buf, a writable memoryview.
+    def raw_read_into(self, buf):
+        t0 = time.thread_time()
+        n = len(buf)
         dwNumBytesRead = ctypes.c_uint()
-        self.check(self.d2xx.FT_Read(self.ftHandle, self.s, n, ctypes.byref(dwNumBytesRead)))
-        assert n == dwNumBytesRead.value
-        return list(self.s)[:n]
+        self.check(self.d2xx.FT_Read(self.ftHandle, (ctypes.c_char * n).from_buffer(buf), n, ctypes.byref(dwNumBytesRead)))
+        if n != dwNumBytesRead.value:
+            raise IOError("Timeout in MPSSE read, %d of %d bytes" % (dwNumBytesRead.value, n))
+        self.rxbytes += n
+        self.rxcpu += time.thread_time() - t0
+    # Write bytes, or a view onto a bytearray which is passed to FT_Write
+    # without a copy.
     def raw_write(self, s):
-        assert type(s) == bytes
         if s:
+            if type(s) != bytes:
+                s = (ctypes.c_char * len(s)).from_buffer(s)
             dwNumBytesSent = ctypes.c_uint()
             self.check(self.d2xx.FT_Write(self.ftHandle, s, len(s), ctypes.byref(dwNumBytesSent)))
     def silent(self, s): # send a silent command - one that expects no response
         self.raw_write(s)
         if self.npending() != 0:
             def hd(s):
-                return "[" + ",".join(["%02x" % ord(c) for c in s]) + "]"
+                return "[" + ",".join(["%02x" % c for c in s]) + "]"
             print("Error after %s - MPSSE receive buffer should be empty, but contains %s" % (hd(s), hd(self.raw_read(self.npending()))))
 
     def csel(self):
@@ -197,54 +239,186 @@ class connector():
             return self.rdstr(a - e, nn + e)[e:]
         if nn & 3:
             return self.rdstr(a, (nn + 3) & ~3)[:nn]
-        a1 = a + nn
-        r = b''
-        while a != a1:
-            # Timout for a read is 7uS for BT82x.
-            # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
-            # Read a maximum of 16 bytes before the "0x01" that signifies data ready.
-            n = min(a1 - a, 0x8000)
-            msg = (struct.pack("<BH", 0x11, 3) + self.addr(a))
-            self.raw_write(self.csel() + msg)
-            def recv(n):
-               self.raw_write(struct.pack("<BH", 0x20, n - 1))
-               while self.npending() < n:
-                   pass
-               r = b''.join(self.raw_read(n))
-               return r
-            bb = recv(16 + n)
+        r = bytearray(nn)
+        self.rd_into(a, memoryview(r))
+        return bytes(r)
+
+    # Timout for a read is 7uS for BT82x.
+    # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
+    # Read a maximum of 16 bytes before the "0x01" that signifies data ready.
+    DUMMY = 16
+    # Reads up to this size are copied from the receive buffer, larger
+    # reads go straight into the caller's buffer.
+    SMALL = 4096
+
+    # MPSSE commands for a whole read transaction, with DUMMY bytes for
+    # the READY byte. The response is DUMMY + n bytes.
+    def read_cmd(self, a, n):
+        return (self.csel() + struct.pack("<BH", 0x11, 3) + self.addr(a) +
+                struct.pack("<BH", 0x20, self.DUMMY + n - 1) + self.cunsel())
+
+    # MPSSE commands for a whole write transaction.
+    def write_cmd(self, a, data):
+        return (self.csel() + struct.pack("<BH", 0x11, 4 + len(data) - 1) + self.addr((2**31) | a) +
+                bytes(data) + self.cunsel())
+
+    # Wait until n bytes can be read. With "block" FT_Read does the
+    # waiting.
+    def wait_pending(self, n):
+        if self.wait == "block":
+            return
+        t0 = time.thread_time()
+        if self.wait == "event":
+            while self.npending() < n:
+                if self.kernel32.WaitForSingleObject(self.event, self.READ_TIMEOUT) != 0:
+                    raise IOError("Timeout in MPSSE read")
+        else:
+            while self.npending() < n:
+                pass
+        self.rxcpu += time.thread_time() - t0
+
+    # Print the CPU time used to read each byte since the last report.
+    def report(self):
+        if self.rxbytes:
+            print(f"D2XX {self.wait}: read {self.rxbytes} bytes, CPU {self.rxcpu * 1e3:.1f} ms, {self.rxcpu * 1e9 / self.rxbytes:.0f} ns/byte")
+        self.rxbytes = 0
+        self.rxcpu = 0.0
+
+    # Read len(buf) bytes into buf, a writable memoryview, in place.
+    # Each chunk is one FT_Write of the whole transaction. The response is
+    # then taken from the driver's queue, with the data read straight into
+    # buf.
+    def rd_into(self, a, buf):
+        assert (a & 3) == 0
+        nn = len(buf)
+        assert (nn & 3) == 0
+        d = self.DUMMY
+        p = 0
+        while p != nn:
+            n = min(nn - p, 0x8000)
+            self.raw_write(self.read_cmd(a, n) + self.bseq(0x87))
+            self.wait_pending(d + n)
+            # Small responses are read in one FT_Read and copied.
+            bb = self.raw_read(d + n if n <= self.SMALL else d)
             # Read until the "0x01" that signifies data ready.
-            if 1 in bb:             # Got READY byte in response
-                i = bb.index(1)
-                response = bb[i + 1:i + 1 + n]
+            i = self.s.find(1, 0, d)
+            if i < 0:
+                                    # Read again, polling for READY byte
+                if n > self.SMALL:
+                    self.raw_read(n)
+                self.rd_poll(a, buf[p:p + n])
+            elif n <= self.SMALL:   # Got READY byte in response
+                buf[p:p + n] = bb[i + 1:i + 1 + n]
             else:
-                                    # Poll for READY byte
-                while recv(1) == b'\x00':
-                    pass
-                response = b''
-                                    # Handle case of full response not received
-            if len(response) < n:
-                response += recv(n - len(response))
-            self.raw_write(self.cunsel())
+                got = d - i - 1
+                buf[p:p + got] = bb[i + 1:d]
+                self.raw_read_into(buf[p + got:p + n])
+                # The rest of the response follows the data.
+                self.raw_read(got)
             a += n
-            r += response
-        return r
+            p += n
+
+    # Read into buf when the READY byte is late, polling for it one byte
+    # at a time.
+    def rd_poll(self, a, buf):
+        n = len(buf)
+        self.raw_write(self.csel() + struct.pack("<BH", 0x11, 3) + self.addr(a))
+        def request(n):
+            self.raw_write(struct.pack("<BH", 0x20, n - 1) + self.bseq(0x87))
+            self.wait_pending(n)
+        request(1)
+        while self.raw_read(1)[0] != 1:
+            request(1)
+        request(n)
+        self.raw_read_into(buf)
+        self.raw_write(self.cunsel())
+
+    # Run a list of transactions with one FT_Write and one FT_Read. Each
+    # item is (a, n) to read n bytes, or (a, data) to write. Returns the
+    # data of each read in order. A write after a read starts a new batch.
+    # Reads of more than 0x8000 bytes are made with rd() on their own. If
+    # the READY byte of a read was late the batch ends at that read: it is
+    # made again with rd(), then the transactions after it are sent again.
+    # As they are all reads, nothing has been written since the late read.
+    def transfer(self, ops):
+        results = []
+        msg = []
+        reads = []
+        size = 0
+        # Send the batch. Returns the index of the transaction to go on
+        # from if a READY byte was late, otherwise None.
+        def run():
+            nonlocal msg, reads, size
+            if not msg:
+                return None
+            self.raw_write(b''.join(msg) + self.bseq(0x87))
+            self.wait_pending(size)
+            r = self.raw_read(size)
+            batch = reads
+            (msg, reads, size) = ([], [], 0)
+            for (k, j, a, n, p) in batch:
+                i = self.s.find(1, p, p + self.DUMMY)
+                if i < 0:
+                    results[k] = self.rd(a, n)
+                    del results[k + 1:]
+                    return j + 1
+                results[k] = bytes(r[i + 1:i + 1 + n])
+            return None
+        j = 0
+        while True:
+            if j == len(ops):
+                late = run()
+                if late is None:
+                    return results
+                j = late
+                continue
+            (a, x) = ops[j]
+            if isinstance(x, int):
+                assert (a & 3) == 0 and (x & 3) == 0
+                if x > 0x8000 or size + self.DUMMY + x > len(self.s):
+                    late = run()
+                    if late is not None:
+                        j = late
+                        continue
+                if x > 0x8000:
+                    results.append(self.rd(a, x))
+                else:
+                    reads.append((len(results), j, a, x, size))
+                    results.append(None)
+                    msg.append(self.read_cmd(a, x))
+                    size += self.DUMMY + x
+            else:
+                if reads:
+                    late = run()
+                    if late is not None:
+                        j = late
+                        continue
+                for (parts, n) in chunks([x], 64000):
+                    msg.append(self.write_cmd(a, b''.join(parts)))
+                    a += n
+            j += 1
 
     def wr(self, a, s, inc=True):
+        self.writev(a, [s], inc)
+
+    # Write a list of buffers to consecutive addresses, as if they were
+    # joined. Each 64000 byte chunk is framed in a reusable buffer and sent
+    # with one FT_Write.
+    def writev(self, a, bufs, inc=True):
         assert (a & 3) == 0
-        assert (len(s) & 3) == 0
-
-        t = len(s)
-        ww = []
-        while t:
-            n = min(64000, t)
-            msg = struct.pack("<BH", 0x11, 4 + n - 1) + self.addr((2**31) | a) + s[:n]
-            ww.append(self.csel() + msg + self.cunsel())
+
+        f = self.frame
+        for (parts, n) in chunks(bufs, 64000):
+            assert (n & 3) == 0
+            f[0:10] = self.csel() + struct.pack("<BH", 0x11, 4 + n - 1) + self.addr((2**31) | a)
+            p = 10
+            for b in parts:
+                f[p:p + len(b)] = b
+                p += len(b)
+            f[p:p + 3] = self.cunsel()
+            self.raw_write(memoryview(f)[:p + 3])
             if inc: 
                 a += n
-            t -= n
-            s = s[n:]
-        self.raw_write(b''.join(ww))
 
     def cs(self, v):
         if v:
@@ -284,9 +458,8 @@ class connector():
             self.raw_write(self.csel() + msg)
             n = 128
             self.raw_write(struct.pack("<BH", 0x20, n - 1))
-            while self.npending() < n:
-                pass
-            r = b''.join(self.raw_read(n))
+            self.wait_pending(n)
+            r = bytes(self.raw_read(n))
             self.raw_write(self.cunsel())
             t0 = time.monotonic_ns()
             fault = False
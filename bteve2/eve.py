@@ -2,11 +2,54 @@
 
 import struct
 import array
+import time
 from collections import namedtuple
+from sys import implementation
+
+from .commands import DISPLAY_LIST, COPROCESSOR, display_list, coprocessor
+
+# NumPy is optional. It is used to encode arrays of vertices.
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class CoprocessorException(Exception):
     pass
 
+# Raised when a result has been overwritten in RAM_CMD before it was read.
+class ResultException(Exception):
+    pass
+
+# The result field of a co-processor command which has not been read yet.
+# See EVE2.result(). All the pending results are read together when the
+# first of them is needed.
+class Result:
+
+    def __init__(self, eve, end, fmt, convert):
+        self.eve = eve
+        self.end = end
+        self.size = struct.calcsize(fmt)
+        self.fmt = fmt
+        self.convert = convert
+        self.done = False
+        self.value = None
+
+    def set(self, data):
+        r = struct.unpack(self.fmt, data)
+        if len(r) == 1:
+            r = r[0]
+        if self.convert is not None:
+            r = self.convert(r)
+        self.value = r
+        self.done = True
+
+    # Return the value, waiting for the co-processor if needed.
+    def result(self):
+        if not self.done:
+            self.eve.resolve()
+        return self.value
+
 _B0 = b'\x00'
 
 def align4(s):
@@ -16,6 +59,27 @@ def align4(s):
     """
     return s + _B0 * (-len(s) & 3)
 
+# Split a list of buffers into chunks of at most size bytes, as if the
+# buffers were joined. Each chunk is a list of memoryviews onto the
+# buffers and the number of bytes in the chunk.
+def chunks(bufs, size):
+    parts = []
+    n = 0
+    for b in bufs:
+        b = memoryview(b).cast("B")
+        i = 0
+        while i < len(b):
+            k = min(len(b) - i, size - n)
+            parts.append(b[i:i + k])
+            i += k
+            n += k
+            if n == size:
+                yield (parts, n)
+                parts = []
+                n = 0
+    if n:
+        yield (parts, n)
+
 def f16(v):
     return int(round(65536 * v))
 
@@ -63,6 +127,9 @@ _Inputs = namedtuple(
     "state",
     ))
 
+# Plans for read_registers(), keyed by the register names.
+_register_plans = {}
+
 class EVE2:
 
     # EVE Registers
@@ -507,12 +574,89 @@ class EVE2:
     EVE_DISP_DITHER     = 0
     EVE_TOUCH_CONFIG    = 0 # Touch panel settings
 
+    # Set elide to True to skip sending frames which are the same as the
+    # frame on the screen. The number of frames skipped is in elided.
+    elide = False
+    elided = 0
+    frame = None
+    onscreen = None
+    # The background transfer thread, see start_pipeline().
+    pipeline = None
+    # Number of bytes written to the co-processor RAM_CMD space.
+    sent = 0
+    # Results which have not been read, see result().
+    results = ()
+    # The free space in RAM_CMD is only read when the estimate in
+    # self.space is too small. Blocks are not written until there is room
+    # for at least WRITE_MIN bytes. While waiting the first WAIT_SPINS
+    # reads are made one after another, then they are spaced by sleeps
+    # which double from WAIT_MIN up to WAIT_MAX seconds. The count starts
+    # again after each block written.
+    WRITE_MIN = 256
+    WAIT_SPINS = 20
+    WAIT_MIN = 0.00005
+    WAIT_MAX = 0.002
+    # Number of reads of REG_CMDB_SPACE, and the number of blocks written
+    # from the estimate without reading REG_CMDB_SPACE.
+    spacereads = 0
+    spacesaved = 0
+    # How wait_finished() waits for the co-processor: "poll", "interrupt",
+    # "gpio" or "estimate". See the wait_ methods.
+    completion = "poll"
+    measure = False
+    finishes = 0
+    finishtime = 0.0
+    finishcpu = 0.0
+    finishlatency = 0.0
+    # Interrupt flags read while waiting.
+    armed = False
+    intflags = 0
+    # Bytes per second read by the co-processor, and the fraction of the
+    # expected time to sleep for.
+    drainrate = None
+    ESTIMATE_MARGIN = 0.9
+    # Registers in the register file which are no more than READ_GAP bytes
+    # apart are read in one transaction by read_registers().
+    READ_GAP = 256
+    # Registers which change when they are read. A transaction of
+    # read_registers() never covers one of these unless it was asked for.
+    READ_CLEARS = (REG_INT_FLAGS,)
+
     # Reset and wait until the co-processor is ready.
     def boot(self):
         print("Booting")
         self.reset()
+        self.armed = False
         self.getspace()
 
+    # Read len(buf) bytes from an address on the EVE into buf, a writable
+    # memoryview. Connectors with rd_into replace this.
+    def rd_into(self, a, buf):
+        buf[:] = self.rd(a, len(buf))
+
+    # Write a list of buffers to consecutive addresses on the EVE, as if
+    # they were joined. Connectors with writev replace this.
+    def writev(self, a, bufs, inc = True):
+        for b in bufs:
+            self.wr(a, b, inc)
+            if inc:
+                a += memoryview(b).nbytes
+
+    # Run a list of transactions. Each item is (a, n) to read n bytes, or
+    # (a, data) to write. Returns the data of each read in order.
+    # Connectors with transfer replace this, to send all the transactions
+    # together.
+    def transfer(self, ops):
+        results = []
+        for (a, x) in ops:
+            self.cs(True)
+            if isinstance(x, int):
+                results.append(self.rd(a, x))
+            else:
+                self.wr(a, x)
+            self.cs(False)
+        return results
+
     # Read a 32 bit word from an address on the EVE.
     def rd32(self, a):
         self.cs(True)
@@ -520,6 +664,60 @@ class EVE2:
         self.cs(False)
         return r
 
+    # Read a list of registers, given by name, and return a namedtuple of
+    # their values. Registers in the register file are grouped into as few
+    # blocks as possible and each block is read in one transaction.
+    def read_registers(self, names):
+        names = tuple(names)
+        plan = _register_plans.get(names)
+        if plan is None:
+            plan = _register_plans[names] = self.register_plan(names)
+        (record, blocks) = plan
+        values = [0] * len(names)
+        data = self.transfer([(a, size) for (a, size, fields) in blocks])
+        for ((a, size, fields), data) in zip(blocks, data):
+            for (offset, index) in fields:
+                values[index] = struct.unpack_from("I", data, offset)[0]
+        return record(*values)
+
+    # Group the registers into blocks of (address, size, fields) where each
+    # field is the offset in the block of a register and its index in the
+    # list of names.
+    def register_plan(self, names):
+        record = namedtuple("Registers", names)
+        regs = sorted((getattr(self, n), i) for (i, n) in enumerate(names))
+        blocks = []
+        for (a, i) in regs:
+            if blocks:
+                (start, size, fields) = blocks[-1]
+                end = start + size
+                skipped = any((end <= r < a) for r in self.READ_CLEARS)
+                if (a < end + self.READ_GAP) and (0x7f004000 <= start) and (a < self.RAM_DL) and not skipped:
+                    if a + 4 > end:
+                        size = a + 4 - start
+                    blocks[-1] = (start, size, fields + [(a - start, i)])
+                    continue
+            blocks.append((a, 4, [(0, i)]))
+        return (record, blocks)
+
+    # Write a list of (register, value) pairs in order.
+    # The writes are added to the command buffer as CMD_REGWRITE commands
+    # so they are made in order with the other commands in it. With direct
+    # set they are written straight away, each run of writes to ascending
+    # adjacent registers in one transaction.
+    def write_registers(self, writes, direct = False):
+        if not direct:
+            for (a, v) in writes:
+                self.CMD_REGWRITE(a, v)
+            return
+        runs = []
+        for (a, v) in writes:
+            if runs and (a == runs[-1][0][0] + 4 * len(runs[-1])):
+                runs[-1].append((a, v))
+            else:
+                runs.append([(a, v)])
+        self.transfer([(run[0][0], struct.pack("%dI" % len(run), *[v for (a, v) in run])) for run in runs])
+
     # Write 32 bit word to an address on the EVE.
     def wr32(self, a, v):
         self.cs(True)
@@ -533,8 +731,15 @@ class EVE2:
     # Query the co-processor RAM_CMD space.
     # When the co-processor is idle this will be FIFO_MAX.
     # Note: when bit 0 is set then the co-processor has encountered an error.
+    # The space is read and stored while holding the pipeline lock, so
+    # that it is not stored after the transfer thread has written more.
     def getspace(self):
-        self.space = self.rd32(self.REG_CMDB_SPACE)
+        self.spacereads += 1
+        self.hold(True)
+        try:
+            self.space = self.rd32(self.REG_CMDB_SPACE)
+        finally:
+            self.hold(False)
         if self.space & 1:
             self.cs(True)
             message = self.rd(self.RAM_REPORT, 256).strip(b'\x00').decode('ascii')
@@ -550,23 +755,57 @@ class EVE2:
     # Write data to the co-processor RAM_CMD space. First checks to see if
     # there is sufficient space.
     # Buffer here and write in batches in the connector.
+    # The data may be a memoryview, each batch is a window onto it.
+    # The space is only decreased by the amount written, the co-processor
+    # may have made more space since it was read.
+    # The space and the count of bytes sent are changed under the pipeline
+    # lock, with the transaction, see hold().
     def write(self, ss):
         i = 0
-        while i < len(ss):
-            avail = max(0, self.space - 16)
-            if (avail > 0): 
+        n = len(ss)
+        reads = self.spacereads
+        tries = 0
+        while i < n:
+            avail = self.space - 16
+            if avail >= min(n - i, self.WRITE_MIN):
                 send = ss[i:i + avail]
-                i += avail
+                i += len(send)
                 self.cs(True)
                 self.wr(self.REG_CMDB_WRITE, send, False)
+                self.space -= len(send)
+                self.sent += len(send)
                 self.cs(False)
-                self.space -= avail
+                if reads == self.spacereads:
+                    self.spacesaved += 1
+                reads = self.spacereads
+                tries = 0
             else:
+                tries = self.backoff(tries)
                 self.getspace()
 
+    # The sleep before polling the co-processor again after tries polls.
+    # There is no sleep for the first WAIT_SPINS polls.
+    def backoff_delay(self, tries):
+        if tries < self.WAIT_SPINS:
+            return 0
+        return min(self.WAIT_MAX, self.WAIT_MIN * (1 << min(tries - self.WAIT_SPINS, 16)))
+
+    # Wait before polling the co-processor again and return the number of
+    # polls made.
+    def backoff(self, tries):
+        delay = self.backoff_delay(tries)
+        if delay:
+            time.sleep(delay)
+        return tries + 1
+
     # Write data to the RAM_G.
+    # The data may be a list of buffers, which are written one after the
+    # other without joining them.
     def write_ramg(self, ss, a):
-        self.wr(a, ss, True)
+        if isinstance(ss, list):
+            self.writev(a, ss, True)
+        else:
+            self.wr(a, ss, True)
 
     # @brief EVE API: Begin coprocessor list
     # @details Starts a coprocessor list. Waits for the coprocessor to be idle
@@ -578,7 +817,8 @@ class EVE2:
     # @brief EVE API: End coprocessor list
     # @details Ends a coprocessor list. Deasserts chip select.
     def LIB_EndCoProList(self):
-        pass
+        if self.elide:
+            self.elide_frame()
 
     # @brief EVE API: Waits for coprocessor list to end
     # @details Will poll the coprocessor command list until it has been completed.
@@ -606,7 +846,7 @@ class EVE2:
 
     # @brief EVE API: Write a buffer to memory mapped RAM
     # @details Writes a block of data via SPI to the EVE.
-    # @param s - data buffer.
+    # @param s - data buffer, or a list of buffers.
     # @param a - Memory mapped address on EVE.
     def LIB_WriteDataToRAMG(self, s, a):
         self.cs(True)
@@ -618,17 +858,25 @@ class EVE2:
     # @param s - Pointer to start of receive data buffer.
     # @param len - Number of bytes to read (rounded up to be 32-bit aligned).
     # @param a - 24 bit memory mapped address on EVE.
+    # The data is read into one bytearray and returned as bytes.
     def LIB_ReadDataFromRAMG(self, n, a):
-        s = b''
         assert (n & 3) == 0, "Data must be a multiple of 4 bytes"
-        while n > 0:
-            chunk = min((1024 * 32), n)
+        s = bytearray(n)
+        self.read_ramg_into(a, s)
+        return bytes(s)
+
+    # Read len(buf) bytes from the RAM_G at address a into buf, a bytearray
+    # or writable memoryview, in place.
+    def read_ramg_into(self, a, buf):
+        view = memoryview(buf)
+        n = len(view)
+        p = 0
+        while p < n:
+            chunk = min((1024 * 32), n - p)
             self.cs(True)
-            s = s + self.rd(a, chunk)
+            self.rd_into(a + p, view[p:p + chunk])
             self.cs(False)
-            n -= chunk
-            a += chunk
-        return s
+            p += chunk
 
     # @brief EVE API: Write a buffer to the coprocessor command memory
     # @details Writes a block of data via SPI to the EVE coprocessor.
@@ -643,22 +891,189 @@ class EVE2:
 
     # Perform a swap command in the co-processor. 
     # This will optionally call the finish function to send the data to
-    # the co-processor then wait for it to complete.
-    def swap(self, finish = True):
+    # the co-processor then wait for it to complete. When force is True the
+    # frame is sent even if elide would skip it.
+    def swap(self, finish = True, force = False):
         self.DISPLAY()
         self.CMD_SWAP()
+        if self.elide:
+            self.elide_frame(force)
         if finish:
             self.finish()
 
+    # Remove the frame from the command buffer if it is the same as the
+    # frame on the screen. The frame is the commands from CMD_DLSTART to a
+    # CMD_SWAP at the end of the buffer. Frames which are already partly
+    # sent to the co-processor are never removed. When no frame has been
+    # started since the last call, for example LIB_EndCoProList() after
+    # swap(), nothing is done.
+    # Only the command bytes are compared. A frame which draws from RAM_G
+    # data changed since the last frame, such as a display list called with
+    # CMD_CALLLIST after new vertexes are written, looks unchanged. Use
+    # force to send the frame anyway; it then becomes the frame on the
+    # screen. Setting onscreen to None has the same effect on the next frame.
+    def elide_frame(self, force = False):
+        frame = self.frame
+        self.frame = None
+        if frame is None:
+            return False
+        if frame[0] != self.flushed():
+            self.onscreen = None
+            return False
+        start = frame[1]
+        end = self.bufptr
+        if self.buf[end - 4:end] != b'\x01\xff\xff\xff':
+            return False
+        if self.results and self.results[-1].end > frame[0] + start:
+            # The frame has results to be read.
+            self.onscreen = None
+            return False
+        commands = bytes(self.buf[start:end])
+        if commands == self.onscreen and not force:
+            self.bufptr = start
+            self.elided += 1
+            return True
+        self.onscreen = commands
+        return False
+
+    # CMD_DLSTART()
+    # The start of the frame is noted when elide is True.
+    def CMD_DLSTART(self, *args):
+        if self.elide:
+            self.frame = (self.flushed(), self.bufptr)
+        self.cmd0(0x00)
+
     # Finish a display list in the co-processor.
     # The command buffer is sent to the co-processor then it will optionally
     # wait for the co-processor to complete.
     # Note that this will be synchronised with the frame rate.
     def finish(self, wait = True):
         self.flush()
+        self.sync()
         if wait:
-            while not self.is_finished():
-                pass
+            self.wait_finished()
+
+    # Wait for the co-processor to complete the commands sent to it, using
+    # the method named by completion. When measure is set the number of
+    # waits, the time and CPU time spent waiting, and the wake latency are
+    # added up. The wake latency is the time from the last check that
+    # found the co-processor busy to the check that found it finished, so
+    # it is an upper bound. CPU time is only measured on CPython.
+    def wait_finished(self):
+        wait = getattr(self, "wait_" + self.completion)
+        if not self.measure:
+            wait()
+            return
+        t0 = time.monotonic()
+        c0 = time.process_time()
+        busy = wait()
+        t1 = time.monotonic()
+        self.finishes += 1
+        self.finishtime += t1 - t0
+        self.finishcpu += time.process_time() - c0
+        self.finishlatency += t1 - max(busy, t0)
+
+    # Each wait method returns the time of the last check that found the
+    # co-processor busy.
+
+    # Read REG_CMDB_SPACE with a back-off between reads.
+    def wait_poll(self):
+        busy = time.monotonic()
+        tries = 0
+        while not self.is_finished():
+            busy = time.monotonic()
+            tries = self.backoff(tries)
+        return busy
+
+    # Enable the INT_CMDEMPTY interrupt. The interrupt mask is read so that
+    # other interrupts enabled by the application are kept.
+    def arm_interrupt(self):
+        if not self.armed:
+            self.wr32(self.REG_INT_MASK, self.rd32(self.REG_INT_MASK) | self.INT_CMDEMPTY)
+            self.wr32(self.REG_INT_EN, 1)
+            self.armed = True
+
+    # Read REG_INT_FLAGS with a back-off between reads. Reading the flags
+    # clears them, so they are kept in intflags for the application.
+    # The flag may be left from an earlier wait, so REG_CMDB_SPACE is read
+    # to confirm. It is also read at the longest back-off so that a
+    # co-processor fault is reported.
+    def wait_interrupt(self):
+        self.arm_interrupt()
+        busy = time.monotonic()
+        tries = 0
+        while True:
+            flags = self.rd32(self.REG_INT_FLAGS)
+            self.intflags |= flags
+            if (flags & self.INT_CMDEMPTY) or (self.backoff_delay(tries) == self.WAIT_MAX):
+                if self.is_finished():
+                    return busy
+            busy = time.monotonic()
+            tries = self.backoff(tries)
+
+    # Wait on the interrupt line of the EVE with the connector's wait_int()
+    # method. Connectors without one use wait_interrupt().
+    def wait_gpio(self):
+        wait_int = getattr(self.connector, "wait_int", None)
+        if wait_int is None:
+            return self.wait_interrupt()
+        self.arm_interrupt()
+        while True:
+            asserted = wait_int(self.WAIT_MAX)
+            # The line was watched until now.
+            busy = time.monotonic()
+            if asserted:
+                # Reading the flags releases the interrupt line.
+                self.intflags |= self.rd32(self.REG_INT_FLAGS)
+            if self.is_finished():
+                return busy
+
+    # Sleep for the time the co-processor is expected to take to read the
+    # commands in RAM_CMD, then poll. The rate is measured at each wait.
+    def wait_estimate(self):
+        t0 = time.monotonic()
+        pending = self.FIFO_MAX - self.space
+        if self.drainrate and pending > 0:
+            time.sleep(self.ESTIMATE_MARGIN * pending / self.drainrate)
+        busy = self.wait_poll()
+        elapsed = time.monotonic() - t0
+        if pending > 0 and elapsed > 0:
+            rate = pending / elapsed
+            if self.drainrate:
+                rate = (3 * self.drainrate + rate) / 4
+            self.drainrate = rate
+        return busy
+
+    # Wait for the command buffer to be sent to the co-processor.
+    # Without a pipeline the buffer is sent by flush().
+    def sync(self):
+        pass
+
+    # Take (v True) or release (v False) the pipeline lock, if there is a
+    # pipeline, so that no commands are written by the transfer thread
+    # meanwhile.
+    def hold(self, v):
+        pipeline = self.pipeline
+        if pipeline is not None:
+            if v:
+                pipeline.lock.acquire()
+            else:
+                pipeline.lock.release()
+
+    # Send the command buffer from a background thread while the next
+    # commands are added. See pipeline.py. Call stop() on the returned
+    # pipeline to go back to sending from the application thread.
+    def start_pipeline(self):
+        if self.pipeline is None:
+            from .pipeline import Pipeline
+            self.pipeline = Pipeline(self)
+        return self.pipeline
+
+    # Record the commands of a frame into a template that can be replayed
+    # with some parameters changed. See record.py.
+    def record(self):
+        from .record import Template
+        return Template(self)
 
     # Recover from a coprocessor exception.
     def recover(self):
@@ -671,11 +1086,95 @@ class EVE2:
 
     # Return the result field of the preceding command
     def previous(self, offset = 1, fmt = "I"):
+        self.finish(wait=True)
+        return self.read_previous(offset, fmt)
+
+    # Number of bytes flushed from the command buffer. With a pipeline
+    # this includes the buffers waiting to be sent.
+    def flushed(self):
+        if self.pipeline is not None:
+            return self.pipeline.queued
+        return self.sent
+
+    # Return a Result for the result field of the preceding command. The
+    # value is read later, and the results of many commands can be read
+    # with one wait for the co-processor and one read of RAM_CMD.
+    # RAM_CMD is a ring buffer, so results which would be overwritten by
+    # the next commands sent are read first, see keep_results().
+    def result(self, fmt = "I", convert = None):
+        r = Result(self, self.flushed() + self.bufptr, fmt, convert)
+        if not self.results:
+            self.results = []
+        elif (r.end - self.results[0].end) >= (self.FIFO_MAX // 2):
+            self.resolve()
+            self.results = []
+        self.results.append(r)
+        return r
+
+    # Wait for the co-processor then read all the pending results.
+    # Sending the buffer may read some of them first, see keep_results().
+    def resolve(self):
+        if not self.results:
+            return
+        self.finish(wait=True)
+        results = self.results
+        self.results = ()
+        if results:
+            self.read_results(results)
+
+    # Read the pending results which sending another n bytes of commands
+    # would overwrite in RAM_CMD. This waits for the co-processor, and is
+    # called before each command buffer is sent.
+    def keep_results(self, n):
+        results = self.results
+        if not results:
+            return
+        limit = self.flushed() + n - (self.FIFO_MAX + 4)
+        if (results[0].end - results[0].size) >= limit:
+            return
+        self.results = [r for r in results if (r.end - r.size) >= limit]
+        self.sync()
+        self.wait_finished()
+        self.read_results([r for r in results if (r.end - r.size) < limit])
+
+    # Send the co-processor buffer to the EVE device, reading the results
+    # that it would overwrite first.
+    def flush(self):
+        self.keep_results(self.bufptr)
+        super().flush()
+
+    # Read results from RAM_CMD. The co-processor must have finished the
+    # commands they belong to. REG_CMD_WRITE is the ring offset of the end
+    # of the bytes sent, it is read with the pipeline lock held so that
+    # it matches sent.
+    def read_results(self, results):
+        size = self.FIFO_MAX + 4
+        start = min(r.end - r.size for r in results)
+        span = max(r.end for r in results) - start
+        self.hold(True)
+        try:
+            total = self.sent
+            if (total - start) > size:
+                raise ResultException("Results have been overwritten in RAM_CMD")
+            offset = (self.rd32(self.REG_CMD_WRITE) - (total - start)) & self.FIFO_MAX
+            first = min(span, size - offset)
+            if first < span:
+                data = b''.join(self.transfer(((self.RAM_CMD + offset, first), (self.RAM_CMD, span - first))))
+            else:
+                (data,) = self.transfer(((self.RAM_CMD + offset, first),))
+        finally:
+            self.hold(False)
+        for r in results:
+            i = r.end - r.size - start
+            r.set(data[i:i + r.size])
+
+    # Read the result field of the preceding command from RAM_CMD.
+    # The co-processor must have finished.
+    def read_previous(self, offset = 1, fmt = "I"):
         assert offset > 0, "Offset to result must be greater than zero"
         offset -= 1
         # Change the offset to 32-bit word offset
         offset *= 4
-        self.finish(wait=True)
         size = struct.calcsize(fmt)
         assert (size % 4) == 0, "Result format must be a mulitple of 4 bytes"
         cmdoffset = (self.rd32(self.REG_CMD_READ) - offset - size) & self.FIFO_MAX
@@ -712,9 +1211,15 @@ class EVE2:
     # Read the touch inputs.
     def get_inputs(self):
         self.finish()
-        t = _Touch(*struct.unpack("hhHHhhhhhhhhI", self.rd(self.REG_TOUCH_RAW_XY, 28)))
+        return self.read_inputs()
 
-        r = _Tracker(*struct.unpack("HH", self.rd(self.REG_TRACKER, 4)))
+    # Read the touch and tracker registers without waiting for the
+    # co-processor.
+    def read_inputs(self):
+        (touch, tracker) = self.transfer(((self.REG_TOUCH_RAW_XY, 28), (self.REG_TRACKER, 4)))
+        t = _Touch(*struct.unpack("hhHHhhhhhhhhI", touch))
+
+        r = _Tracker(*struct.unpack("HH", tracker))
 
         if not hasattr(self, "prev_touching"):
             self.prev_touching = False
@@ -791,13 +1296,8 @@ class EVE2:
         self.CLEAR()
         self.CMD_SWAP()
         self.CMD_GRAPHICSFINISH()
-        self.LIB_EndCoProList()
-        self.LIB_AwaitCoProEmpty()
 
         (self.w, self.h) = (surface.w, surface.h)
-        self.LIB_BeginCoProList()
-        self.CMD_REGWRITE(self.REG_GPIO, 0x80)
-        self.CMD_REGWRITE(self.REG_DISP, 1)
 
         self.EVE_DISP_WIDTH = self.w
         self.EVE_DISP_HEIGHT = self.h
@@ -841,320 +1341,108 @@ class EVE2:
         if touch:
             self.EVE_TOUCH_CONFIG = ((touch.address << 4) | (touch.type) | (1 << 11)) 
 
-        self.CMD_REGWRITE(self.REG_HSIZE, self.EVE_DISP_WIDTH)
-        self.CMD_REGWRITE(self.REG_VSIZE, self.EVE_DISP_HEIGHT)
-        self.CMD_REGWRITE(self.REG_HCYCLE, self.EVE_DISP_HCYCLE)
-        self.CMD_REGWRITE(self.REG_HOFFSET, self.EVE_DISP_HOFFSET)
-        self.CMD_REGWRITE(self.REG_HSYNC0, self.EVE_DISP_HSYNC0)
-        self.CMD_REGWRITE(self.REG_HSYNC1, self.EVE_DISP_HSYNC1)
-        self.CMD_REGWRITE(self.REG_VCYCLE, self.EVE_DISP_VCYCLE)
-        self.CMD_REGWRITE(self.REG_VOFFSET, self.EVE_DISP_VOFFSET)
-        self.CMD_REGWRITE(self.REG_VSYNC0, self.EVE_DISP_VSYNC0)
-        self.CMD_REGWRITE(self.REG_VSYNC1, self.EVE_DISP_VSYNC1)
-        self.CMD_REGWRITE(self.REG_PCLK_POL, self.EVE_DISP_PCLKPOL)
-        self.CMD_REGWRITE(self.REG_RE_DITHER, self.EVE_DISP_DITHER)
+        # The render target and panel registers are set in the same
+        # co-processor list. The only wait is before the LVDS PLL is
+        # enabled with direct register writes.
+        self.write_registers((
+            (self.REG_GPIO, 0x80),
+            (self.REG_DISP, 1),
+            (self.REG_HSIZE, self.EVE_DISP_WIDTH),
+            (self.REG_VSIZE, self.EVE_DISP_HEIGHT),
+            (self.REG_HCYCLE, self.EVE_DISP_HCYCLE),
+            (self.REG_HOFFSET, self.EVE_DISP_HOFFSET),
+            (self.REG_HSYNC0, self.EVE_DISP_HSYNC0),
+            (self.REG_HSYNC1, self.EVE_DISP_HSYNC1),
+            (self.REG_VCYCLE, self.EVE_DISP_VCYCLE),
+            (self.REG_VOFFSET, self.EVE_DISP_VOFFSET),
+            (self.REG_VSYNC0, self.EVE_DISP_VSYNC0),
+            (self.REG_VSYNC1, self.EVE_DISP_VSYNC1),
+            (self.REG_PCLK_POL, self.EVE_DISP_PCLKPOL),
+            (self.REG_RE_DITHER, self.EVE_DISP_DITHER),
+            ))
         self.LIB_EndCoProList()
         self.LIB_AwaitCoProEmpty()
 
         # 0: 1 pixel single // 1: 2 pixel single // 2: 2 pixel dual // 3: 4 pixel dual
         extsyncmode = 3
         TXPLLDiv = 0x03
-        self.wr32(self.REG_LVDSTX_PLLCFG, 0x00300870 + TXPLLDiv if TXPLLDiv > 4 else 0x00301070 + TXPLLDiv)
-        self.wr32(self.REG_LVDSTX_EN, 7) # Enable PLL
+        self.write_registers((
+            (self.REG_LVDSTX_PLLCFG, 0x00300870 + TXPLLDiv if TXPLLDiv > 4 else 0x00301070 + TXPLLDiv),
+            (self.REG_LVDSTX_EN, 7), # Enable PLL
+            ), direct = True)
 
+        # The scanout registers are sent to the co-processor without
+        # waiting for it, the application's first wait covers them.
         self.LIB_BeginCoProList()
-        self.CMD_REGWRITE(self.REG_SO_MODE, extsyncmode)
-        self.CMD_REGWRITE(self.REG_SO_SOURCE, surface.addr)
-        self.CMD_REGWRITE(self.REG_SO_FORMAT, surface.fmt)
-        self.CMD_REGWRITE(self.REG_SO_EN, 1)
+        self.write_registers((
+            (self.REG_SO_MODE, extsyncmode),
+            (self.REG_SO_SOURCE, surface.addr),
+            (self.REG_SO_FORMAT, surface.fmt),
+            (self.REG_SO_EN, 1),
+            ))
         self.LIB_EndCoProList()
-        self.LIB_AwaitCoProEmpty()
+        self.finish(wait=False)
 
-    # The basic graphics instructions for DISPLAY Lists.
-    def ALPHA_FUNC(self, func, ref):
-        self.AlphaFunc(func, ref)
-    def BEGIN(self, prim):
-        self.Begin(prim)
-    def BITMAP_EXT_FORMAT(self, fmt):
-        self.BitmapExtFormat(fmt)
-    def BITMAP_HANDLE(self, handle):
-        self.BitmapHandle(handle)
-    def BITMAP_LAYOUT(self, format, linestride, height):
-        self.BitmapLayout(format, linestride, height)
-    def BITMAP_LAYOUT_H(self, linestride, height):
-        self.BitmapLayoutH(linestride, height)
-    def BITMAP_SIZE(self, filter, wrapx, wrapy, width, height):
-        self.BitmapSize(filter, wrapx, wrapy, width, height)
-    def BITMAP_SIZE_H(self, width, height):
-        self.BitmapSizeH(width, height)
-    def BITMAP_SOURCE(self, addr):
-        self.BitmapSource(addr)
-    def BITMAP_SOURCE_H(self, addr):
-        self.BitmapSourceH(addr)
-    def BITMAP_SWIZZLE(self, r, g, b, a):
-        self.BitmapSwizzle(r, g, b, a)
-    def BITMAP_TRANSFORM_A(self, p, a):
-        self.BitmapTransformA(p, a)
-    def BITMAP_TRANSFORM_B(self, p, b):
-        self.BitmapTransformB(p, b)
-    def BITMAP_TRANSFORM_C(self, c):
-        self.BitmapTransformC(c)
-    def BITMAP_TRANSFORM_D(self, p, d):
-        self.BitmapTransformD(p, d)
-    def BITMAP_TRANSFORM_E(self, p, e):
-        self.BitmapTransformE(p, e)
-    def BITMAP_TRANSFORM_F(self, f):
-        self.BitmapTransformF(f)
-    def BITMAP_ZORDER(self, o):
-        self.BitmapZorder(o)
-    def BLEND_FUNC(self, src, dst):
-        self.BlendFunc(src, dst)
-    def CALL(self, dest):
-        self.Call(dest)
-    def CELL(self, cell):
-        self.Cell(cell)
-    def CLEAR_COLOR_A(self, alpha):
-        self.ClearColorA(alpha)
-    def CLEAR_COLOR_RGB(self, red, green, blue):
-        self.ClearColorRGB(red, green, blue)
+    # The basic graphics instructions for DISPLAY Lists are made from the
+    # table in commands.py. These two take a packed 24-bit colour.
     def CLEAR_COLOR(self, c):
         self.c4((2 << 24) | (c&0xffffff))
-    def CLEAR(self, c = 1, s = 1, t = 1):
-        self.Clear(c, s, t)
-    def CLEAR_STENCIL(self, s):
-        self.ClearStencil(s)
-    def CLEAR_TAG(self, s):
-        self.ClearTag(s)
-    def COLOR_A(self, alpha):
-        self.ColorA(alpha)
-    def COLOR_MASK(self, r, g, b, a):
-        self.ColorMask(r, g, b, a)
-    def COLOR_RGB(self, red, green, blue):
-        self.ColorRGB(red, green, blue)
     def COLOR(self, c):
         self.c4((4 << 24) | (c&0xffffff))
-    def DISPLAY(self):
-        self.Display()
-    def END(self):
-        self.End()
-    def JUMP(self, dest):
-        self.Jump(dest)
-    def LINE_WIDTH(self, width):
-        self.LineWidth(width)
-    def MACRO(self, m):
-        self.Macro(m)
-    def NOP(self):
-        self.Nop()
-    def PALETTE_SOURCE(self, addr):
-        self.PaletteSource(addr)
-    def PALETTE_SOURCE_H(self, addr):
-        self.PaletteSourceH(addr)
-    def POINT_SIZE(self, size):
-        self.PointSize(size)
-    def REGION(self, y, h, dest):
-        self.Region(y, h, dest)
-    def RESTORE_CONTEXT(self):
-        self.RestoreContext()
-    def RETURN(self):
-        self.Return()
-    def SAVE_CONTEXT(self):
-        self.SaveContext()
-    def SCISSOR_SIZE(self, width, height):
-        self.ScissorSize(width, height)
-    def SCISSOR_XY(self, x, y):
-        self.ScissorXY(x, y)
-    def STENCIL_FUNC(self, func, ref, mask):
-        self.StencilFunc(func, ref, mask)
-    def STENCIL_MASK(self, mask):
-        self.StencilMask(mask)
-    def STENCIL_OP(self, sfail, spass):
-        self.StencilOp(sfail, spass)
-    def TAG_MASK(self, mask):
-        self.TagMask(mask)
-    def TAG(self, s):
-        self.Tag(s)
-    def VERTEX_FORMAT(self, frac):
-        self.VertexFormat(frac)
-    def VERTEX2F(self, x, y):
-        self.Vertex2f(x, y)
-    def VERTEX2II(self, x, y, handle = 0, cell = 0):
-        self.Vertex2ii(x, y, handle, cell)
-    def VERTEX_TRANSLATE_X(self, x):
-        self.VertexTranslateX(x)
-    def VERTEX_TRANSLATE_Y(self, y):
-        self.VertexTranslateY(y)
-
-    # CMD_ANIMDRAW(int32_t ch)
-    def CMD_ANIMDRAW(self, *args):
-        self.cmd(0x4f, 'i', tuple( int(arg) for arg in args ) )
-
-    # CMD_ANIMFRAME(int16_t x, int16_t y, uint32_t aoptr, uint32_t frame)
-    def CMD_ANIMFRAME(self, *args):
-        self.cmd(0x5e, 'hhII', tuple( int(arg) for arg in args ) )
-
-    # CMD_ANIMSTART(int32_t ch, uint32_t aoptr, uint32_t loop)
-    def CMD_ANIMSTART(self, *args):
-        self.cmd(0x5f, 'iII', tuple( int(arg) for arg in args ) )
-
-    # CMD_ANIMSTOP(int32_t ch)
-    def CMD_ANIMSTOP(self, *args):
-        self.cmd(0x4d, 'i', tuple( int(arg) for arg in args ) )
-
-    # CMD_ANIMXY(int32_t ch, int16_t x, int16_t y)
-    def CMD_ANIMXY(self, *args):
-        self.cmd(0x4e, 'ihh', tuple( int(arg) for arg in args ) )
-
-    # CMD_APPEND(uint32_t ptr, uint32_t num)
-    def CMD_APPEND(self, *args):
-        self.cmd(0x1c, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_APPENDF(uint32_t ptr, uint32_t num)
-    def CMD_APPENDF(self, *args):
-        self.cmd(0x52, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_ARC(int16_t x, int16_t y, uint16_t r0, uint16_t r1, uint16_t a0, uint16_t a1)
-    def CMD_ARC(self, *args):
-        self.cmd(0x87, 'hhHHHH', tuple( int(arg) for arg in args ) )
-
-    # CMD_BGCOLOR(uint32_t c)
-    def CMD_BGCOLOR(self, *args):
-        self.cmd(0x07, 'I', tuple( int(arg) for arg in args ) )
+
+    # Encode arrays of coordinates as VERTEX2F commands in a single step.
+    # The coordinates can be NumPy arrays, array.array or sequences.
+    # If addr is given then the commands are written to RAM_G at that
+    # address with CMD_MEMWRITE rather than added to the display list.
+    def VERTEX2F_ARRAY(self, xs, ys, addr = None):
+        if np:
+            x = np.asarray(xs).astype(np.int64)
+            y = np.asarray(ys).astype(np.int64)
+            words = (0x40000000 | ((x & 32767) << 15) | (y & 32767)).astype("<u4")
+        else:
+            words = array.array("I", [0x40000000 | ((int(x) & 32767) << 15) | (int(y) & 32767) for (x, y) in zip(xs, ys)])
+        if addr is not None:
+            self.CMD_MEMWRITE(addr, len(words) * 4)
+        self.cc(memoryview(words).cast("B"))
+
+    # Encode arrays of coordinates as VERTEX2II commands in a single step.
+    # The handle and cell can be single values or arrays matching the
+    # coordinates. The addr parameter is as for VERTEX2F_ARRAY.
+    def VERTEX2II_ARRAY(self, xs, ys, handle = 0, cell = 0, addr = None):
+        if np:
+            x = np.asarray(xs).astype(np.int64)
+            y = np.asarray(ys).astype(np.int64)
+            h = np.asarray(handle).astype(np.int64)
+            c = np.asarray(cell).astype(np.int64)
+            words = ((2 << 30) | ((x & 511) << 21) | ((y & 511) << 12) | ((h & 31) << 7) | (c & 127)).astype("<u4")
+        else:
+            n = len(xs)
+            hs = handle if hasattr(handle, "__len__") else [handle] * n
+            cs = cell if hasattr(cell, "__len__") else [cell] * n
+            words = array.array("I", [(2 << 30) | ((int(x) & 511) << 21) | ((int(y) & 511) << 12) | ((int(h) & 31) << 7) | (int(c) & 127) for (x, y, h, c) in zip(xs, ys, hs, cs)])
+        if addr is not None:
+            self.CMD_MEMWRITE(addr, len(words) * 4)
+        self.cc(memoryview(words).cast("B"))
 
     def CMD_BGCOLOR_RGB(self, red, green, blue):
         self.CMD_BGCOLOR(((int(red) & 255) << 16) | ((int(green) & 255) << 8) | ((int(blue) & 255)))
 
-    # CMD_BITMAP_TRANSFORM(int32_t x0, int32_t y0, int32_t x1, int32_t y1, int32_t x2, int32_t y2, int32_t tx0, int32_t ty0, int32_t tx1, int32_t ty1, int32_t tx2, int32_t ty2, uint16_t result)
-    def CMD_BITMAP_TRANSFORM(self, *args):
-        self.cmd(0x1f, 'iiiiiiiiiiiiHH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
     # CMD_BUTTON(int16_t x, int16_t y, int16_t w, int16_t h, int16_t font, uint16_t options, const char* s)
     def CMD_BUTTON(self, *args):
         self.cmd(0x0b, 'hhhhhH', tuple( int(arg) for arg in args[:6] ) )
         self.fstring(args[6:])
 
-    # CMD_CALIBRATE(uint32_t result)
-    def CMD_CALIBRATE(self, *args):
-        self.cmd(0x13, 'I', tuple( int(arg) for arg in args ) )
-
     def LIB_Calibrate(self, size):
         self.CMD_CALIBRATE(0)
         return self.previous()
 
-    # CMD_CALIBRATESUB(uint16_t x, uint16_t y, uint16_t w, uint16_t h, uint32_t result)
-    def CMD_CALIBRATESUB(self, *args):
-        self.cmd(0x56, 'HHHHI', tuple( int(arg) for arg in args ) )
-
-    # CMD_CALLLIST(uint32_t a)
-    def CMD_CALLLIST(self, *args):
-        self.cmd(0x5b, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_CGRADIENT(uint32_t shape, int16_t x, int16_t y, int16_t w, int16_t h, uint32_t rgb0, uint32_t rgb1)
-    def CMD_CGRADIENT(self, *args):
-        self.cmd(0x8a, 'IhhhhII', tuple( int(arg) for arg in args ) )
-
-    # CMD_CLOCK(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t h, uint16_t m, uint16_t s, uint16_t ms)
-    def CMD_CLOCK(self, *args):
-        self.cmd(0x12, 'hhhHHHHH', tuple( int(arg) for arg in args ) )
-
-    # CMD_COLDSTART()
-    def CMD_COLDSTART(self, *args):
-        self.cmd0(0x2e)
-
-    # CMD_COPYLIST(uint32_t dst)
-    def CMD_COPYLIST(self, *args):
-        self.cmd(0x88, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_DDRSHUTDOWN()
-    def CMD_DDRSHUTDOWN(self, *args):
-        self.cmd0(0x65)
-
-    # CMD_DDRSTARTUP()
-    def CMD_DDRSTARTUP(self, *args):
-        self.cmd0(0x66)
-
-    # CMD_DIAL(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t val)
-    def CMD_DIAL(self, *args):
-        self.cmd(0x29, "hhhHI", tuple( int(arg) for arg in args ) )
-
-    # CMD_DLSTART()
-    def CMD_DLSTART(self, *args):
-        self.cmd0(0x00)
-
-    # CMD_ENABLEREGION(uint32_t en)
-    def CMD_ENABLEREGION(self, *args):
-        self.cmd(0x7e, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_ENDLIST()
-    def CMD_ENDLIST(self, *args):
-        self.cmd0(0x5d)
-
-    # CMD_FENCE()
-    def CMD_FENCE(self, *args):
-        self.cmd0(0x68)
-
-    # CMD_FGCOLOR(uint32_t c)
-    def CMD_FGCOLOR(self, *args):
-        self.cmd(0x08, 'I', tuple( int(arg) for arg in args ) )
-
     def CMD_FGCOLOR_RGB(self, red, green, blue):
         self.CMD_FGCOLOR(((int(red) & 255) << 16) | ((int(green) & 255) << 8) | ((int(blue) & 255)))
 
-    # CMD_FILLWIDTH(uint32_t s)
-    def CMD_FILLWIDTH(self, *args):
-        self.cmd(0x51, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHATTACH()
-    def CMD_FLASHATTACH(self, *args):
-        self.cmd0(0x43)
-
-    # CMD_FLASHDETACH()
-    def CMD_FLASHDETACH(self, *args):
-        self.cmd0(0x42)
-
-    # CMD_FLASHERASE()
-    def CMD_FLASHERASE(self, *args):
-        self.cmd0(0x3e)
-
-    # CMD_FLASHFAST(uint32_t result)
-    def CMD_FLASHFAST(self, *args):
-        self.cmd(0x44, "I", tuple( int(arg) for arg in args ) )
-
     def LIB_FlashFast(self):
         self.CMD_FLASHFAST(0)
         return self.previous()
 
-    # CMD_FLASHPROGRAM(uint32_t dest, uint32_t src, uint32_t num)
-    def CMD_FLASHPROGRAM(self, *args):
-        self.cmd(0x64, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHREAD(uint32_t dest, uint32_t src, uint32_t num)
-    def CMD_FLASHREAD(self, *args):
-        self.cmd(0x40, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHSOURCE(uint32_t ptr)
-    def CMD_FLASHSOURCE(self, *args):
-        self.cmd(0x48, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHSPIDESEL()
-    def CMD_FLASHSPIDESEL(self, *args):
-        self.cmd0(0x45)
-
-    # CMD_FLASHSPIRX(uint32_t ptr, uint32_t num)
-    def CMD_FLASHSPIRX(self, *args):
-        self.cmd(0x47, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHSPITX(uint32_t num!)
-    def CMD_FLASHSPITX(self, *args):
-        self.cmd(0x46, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHUPDATE(uint32_t dest, uint32_t src, uint32_t num)
-    def CMD_FLASHUPDATE(self, *args):
-        self.cmd(0x41, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_FLASHWRITE(uint32_t ptr, uint32_t num!)
-    def CMD_FLASHWRITE(self, *args):
-        self.cmd(0x3f, 'II', tuple( int(arg) for arg in args ) )
-
     # CMD_FSDIR(uint32_t dst, uint32_t num, const char* path, uint32_t result)
     def CMD_FSDIR(self, *args):
         self.cmd(0x8e, 'II', tuple( int(arg) for arg in args[:2] ) )
@@ -1165,10 +1453,6 @@ class EVE2:
         self.CMD_FSDIR(dst, num, path, 0)
         return self.previous()
 
-    # CMD_FSOPTIONS(uint32_t options)
-    def CMD_FSOPTIONS(self, *args):
-        self.cmd(0x6d, 'I', tuple( int(arg) for arg in args ) )
-
     # CMD_FSREAD(uint32_t dst, const char* filename, uint32_t result)
     def CMD_FSREAD(self, *args):
         self.cmd(0x71, 'I', tuple( int(args[0]) ) )
@@ -1199,14 +1483,6 @@ class EVE2:
         self.CMD_FSSOURCE(filename, 0)
         return self.previous()
 
-    # CMD_GAUGE(int16_t x, int16_t y, int16_t r, uint16_t options, uint16_t major, uint16_t minor, uint16_t val, uint16_t range)
-    def CMD_GAUGE(self, *args):
-        self.cmd(0x11, 'hhhHHHHH', tuple( int(arg) for arg in args ) )
-
-    # CMD_GETIMAGE(uint32_t source, uint32_t fmt, uint32_t w, uint32_t h, uint32_t palette)
-    def CMD_GETIMAGE(self, *args):
-        self.cmd(0x58, 'IIIII', tuple( int(arg) for arg in args ) )
-
     # @brief EVE API: Get image properties.
     # @details From the last CMD_LOADIMAGE get the address, size, format and 
     #   palette of the loaded image.
@@ -1216,9 +1492,10 @@ class EVE2:
         self.CMD_GETIMAGE(0, 0, 0, 0, 0)
         return self.previous(1, "IIiiI")
 
-    # CMD_GETMATRIX(int32_t a, int32_t b, int32_t c, int32_t d, int32_t e, int32_t f)
-    def CMD_GETMATRIX(self, *args):
-        self.cmd(0x2f, 'iiiiii', tuple( int(arg) for arg in args ) )
+    # As LIB_GetImage but returns a Result, see result().
+    def CMD_GETIMAGE_async(self):
+        self.CMD_GETIMAGE(0, 0, 0, 0, 0)
+        return self.result("IIiiI")
 
     # @brief EVE API: Get the touchscreen transformation matrix.
     # @details Obtains the transformation matric from a CMD_CALIBRATE operation.
@@ -1227,9 +1504,10 @@ class EVE2:
         self.CMD_GETMATRIX(0, 0, 0, 0, 0, 0)
         return tuple([x/0x10000 for x in self.previous(1, "6i")])
 
-    # CMD_GETPROPS(uint32_t ptr, uint32_t w, uint32_t h)
-    def CMD_GETPROPS(self, *args):
-        self.cmd(0x22, 'III', tuple( int(arg) for arg in args ) )
+    # As LIB_GetMatrix but returns a Result, see result().
+    def CMD_GETMATRIX_async(self):
+        self.CMD_GETMATRIX(0, 0, 0, 0, 0, 0)
+        return self.result("6i", lambda m: tuple([x/0x10000 for x in m]))
 
     # @brief EVE API: Get properties of an CMD_LOADIMAGE operation
     # @details Obtains the details of an image decoded by the CMD_LOADIMAGE
@@ -1240,9 +1518,10 @@ class EVE2:
         self.CMD_GETPROPS(0, 0, 0)
         return self.previous(1, "Iii")
 
-    # CMD_GETPTR(uint32_t result)
-    def CMD_GETPTR(self, *args):
-        self.cmd(0x20, 'I', tuple( int(arg) for arg in args ) )
+    # As LIB_GetProps but returns a Result, see result().
+    def CMD_GETPROPS_async(self):
+        self.CMD_GETPROPS(0, 0, 0)
+        return self.result("Iii")
 
     # @brief EVE API: Get current allocation pointer
     # @details Obtains the automatic allocation pointer of the last address
@@ -1253,75 +1532,16 @@ class EVE2:
         self.CMD_GETPTR(0)
         return self.previous()
 
-    # CMD_GLOW(int16_t x, int16_t y, int16_t w, int16_t h)
-    def CMD_GLOW(self, *args):
-        self.cmd(0x8b, 'hhhh', tuple( int(arg) for arg in args ) )
-
-    # CMD_GRADCOLOR(uint32_t c)
-    def CMD_GRADCOLOR(self, *args):
-        self.cmd(0x30, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_GRADIENT(int16_t x0, int16_t y0, uint32_t rgb0, int16_t x1, int16_t y1, uint32_t rgb1)
-    def CMD_GRADIENT(self, *args):
-        self.cmd(0x09, 'hhIhhI', tuple( int(arg) for arg in args ) )
-
-    # CMD_GRADIENTA(int16_t x0, int16_t y0, uint32_t argb0, int16_t x1, int16_t y1, uint32_t argb1)
-    def CMD_GRADIENTA(self, *args):
-        self.cmd(0x50, 'hhIhhI', tuple( int(arg) for arg in args ) )
-
-    # CMD_GRAPHICSFINISH()
-    def CMD_GRAPHICSFINISH(self, *args):
-        self.cmd0(0x6b)
-
-    # CMD_I2SSTARTUP(uint32_t freq)
-    def CMD_I2SSTARTUP(self, *args):
-        self.cmd(0x69, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_INFLATE(uint32_t ptr, uint32_t options!)
-    def CMD_INFLATE(self, *args):
-        self.cmd(0x4a, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_INTERRUPT(uint32_t ms)
-    def CMD_INTERRUPT(self, *args):
-        self.cmd(0x02, 'I', tuple( int(arg) for arg in args ) )
+    # As LIB_GetPtr but returns a Result, see result().
+    def CMD_GETPTR_async(self):
+        self.CMD_GETPTR(0)
+        return self.result()
 
     # CMD_KEYS(int16_t x, int16_t y, int16_t w, int16_t h, int16_t font, uint16_t options, const char* s)
     def CMD_KEYS(self, *args):
         self.cmd(0x0c, 'hhhhhH', tuple( int(arg) for arg in args[:6] ) )
         self.fstring(args[6:])
 
-    # CMD_LOADASSET(uint32_t ptr, uint32_t options!)
-    def CMD_LOADASSET(self, *args):
-        self.cmd(0x81, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_LOADIDENTITY()
-    def CMD_LOADIDENTITY(self, *args):
-        self.cmd0(0x23)
-
-    # CMD_LOADIMAGE(uint32_t ptr, uint32_t options!)
-    def CMD_LOADIMAGE(self, *args):
-        self.cmd(0x21, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_LOADWAV(uint32_t dst, uint32_t options!)
-    def CMD_LOADWAV(self, *args):
-        self.cmd(0x85, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_LOGO()
-    def CMD_LOGO(self, *args):
-        self.cmd0(0x2d)
-
-    # CMD_MEDIAFIFO(uint32_t ptr, uint32_t size)
-    def CMD_MEDIAFIFO(self, *args):
-        self.cmd(0x34, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_MEMCPY(uint32_t dest, uint32_t src, uint32_t num)
-    def CMD_MEMCPY(self, *args):
-        self.cmd(0x1b, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_MEMCRC(uint32_t ptr, uint32_t num, uint32_t result)
-    def CMD_MEMCRC(self, *args):
-        self.cmd(0x16, 'III', tuple( int(arg) for arg in args ) )
-
     # @brief EVE API: Calculate the CRC of a memory area.
     # @details Obtains the CRC of a memory area.
     # @param ptr - Start of memory area.
@@ -1331,45 +1551,10 @@ class EVE2:
         self.CMD_MEMCRC(ptr, num, 0)
         return self.previous()
 
-    # CMD_MEMSET(uint32_t ptr, uint32_t value, uint32_t num)
-    def CMD_MEMSET(self, *args):
-        self.cmd(0x19, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_MEMWRITE(uint32_t ptr, uint32_t num!)
-    def CMD_MEMWRITE(self, *args):
-        self.cmd(0x18, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_MEMZERO(uint32_t ptr, uint32_t num)
-    def CMD_MEMZERO(self, *args):
-        self.cmd(0x1a, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_NEWLIST(uint32_t a)
-    def CMD_NEWLIST(self, *args):
-        self.cmd(0x5c, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_NOP()
-    def CMD_NOP(self, *args):
-        self.cmd0(0x53)
-
-    # CMD_NUMBER(int16_t x, int16_t y, int16_t font, uint16_t options, int32_t n)
-    def CMD_NUMBER(self, *args):
-        self.cmd(0x2a, 'hhhHi', tuple( int(arg) for arg in args ) )
-
-    # CMD_PLAYVIDEO(uint32_t options!)
-    def CMD_PLAYVIDEO(self, *args):
-        self.cmd(0x35, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_PLAYWAV(uint32_t options!)
-    def CMD_PLAYWAV(self, *args):
-        self.cmd(0x79, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_PROGRESS(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t range)
-    def CMD_PROGRESS(self, *args):
-        self.cmd(0x0d, 'hhhhHHHH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_REGREAD(uint32_t ptr, uint32_t result)
-    def CMD_REGREAD(self, *args):
-        self.cmd(0x17, 'II', tuple( int(arg) for arg in args ) )
+    # As LIB_MemCrc but returns a Result, see result().
+    def CMD_MEMCRC_async(self, ptr, num):
+        self.CMD_MEMCRC(ptr, num, 0)
+        return self.result()
 
     # @brief EVE API: Read a register.
     # @details Reads a register value.
@@ -1379,138 +1564,19 @@ class EVE2:
         self.CMD_REGREAD(ptr, 0)
         return self.previous()
 
-    # CMD_REGWRITE(uint32_t dst, uint32_t value)
-    def CMD_REGWRITE(self, *args):
-        self.cmd(0x86, "II", tuple( int(arg) for arg in args ) )
-
-    # CMD_RENDERTARGET(uint32_t a, uint16_t fmt, int16_t w, int16_t h)
-    def CMD_RENDERTARGET(self, *args):
-        self.cmd(0x8d, 'IHhhH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_RESETFONTS()
-    def CMD_RESETFONTS(self, *args):
-        self.cmd0(0x4c)
-
-    # CMD_RESTORECONTEXT()
-    def CMD_RESTORECONTEXT(self, *args):
-        self.cmd0(0x7d)
-
-    # CMD_RESULT(uint32_t dst)
-    def CMD_RESULT(self, *args):
-        self.cmd(0x89, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_RETURN()
-    def CMD_RETURN(self, *args):
-        self.cmd0(0x5a)
-
-    # CMD_ROMFONT(uint32_t font, uint32_t romslot)
-    def CMD_ROMFONT(self, *args):
-        self.cmd(0x39, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_ROTATE(int32_t a)
-    def CMD_ROTATE(self, *args):
-        self.cmd(0x26, 'i', tuple( int(arg) for arg in args ) )
-
-    # CMD_ROTATEAROUND(int32_t x, int32_t y, int32_t a, int32_t s)
-    def CMD_ROTATEAROUND(self, *args):
-        self.cmd(0x4b, 'iiii', tuple( int(arg) for arg in args ) )
-
-    # CMD_RUNANIM(uint32_t waitmask, uint32_t play)
-    def CMD_RUNANIM(self, *args):
-        self.cmd(0x60, 'Ii', tuple( int(arg) for arg in args ) )
-
-    # CMD_SAVECONTEXT()
-    def CMD_SAVECONTEXT(self, *args):
-        self.cmd0(0x7c)
-
-    # CMD_SCALE(int32_t sx, int32_t sy)
-    def CMD_SCALE(self, *args):
-        self.cmd(0x25, 'ii', tuple( int(arg) for arg in args ) )
-
-    # CMD_SCREENSAVER()
-    def CMD_SCREENSAVER(self, *args):
-        self.cmd0(0x2b)
-
-    # CMD_SCROLLBAR(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t size, uint16_t range)
-    def CMD_SCROLLBAR(self, *args):
-        self.cmd(0x0f, 'hhhhHHHH', tuple( int(arg) for arg in args ) )
-
-    # CMD_SDATTACH(uint32_t options, uint32_t result)
-    def CMD_SDATTACH(self, *args):
-        self.cmd(0x6e, 'II', tuple( int(arg) for arg in args ) )
+    # As LIB_RegRead but returns a Result, see result().
+    def CMD_REGREAD_async(self, ptr):
+        self.CMD_REGREAD(ptr, 0)
+        return self.result()
 
     def LIB_SDAttach(self, options):
         self.CMD_SDATTACH(options, 0)
         return self.previous()
 
-    # CMD_SDBLOCKREAD(uint32_t dst, uint32_t src, uint32_t count, uint32_t result)
-    def CMD_SDBLOCKREAD(self, *args):
-        self.cmd(0x6f, 'IIII', tuple( int(arg) for arg in args ) )
-
     def LIB_SDBlockRead(self, dst, src, count):
         self.CMD_SDBLOCKREAD(dst, src, count, 0)
         return self.previous()
 
-    # CMD_SETBASE(uint32_t b)
-    def CMD_SETBASE(self, *args):
-        self.cmd(0x33, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_SETBITMAP(uint32_t source, uint16_t fmt, uint16_t w, uint16_t h)
-    def CMD_SETBITMAP(self, *args):
-        self.cmd(0x3d, 'IHHHH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_SETFONT(uint32_t font, uint32_t ptr, uint32_t firstchar)
-    def CMD_SETFONT(self, *args):
-        self.cmd(0x36, 'III', tuple( int(arg) for arg in args ) )
-
-    # CMD_SETMATRIX()
-    def CMD_SETMATRIX(self, *args):
-        self.cmd0(0x27)
-
-    # CMD_SETROTATE(uint32_t r)
-    def CMD_SETROTATE(self, *args):
-        self.cmd(0x31, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_SETSCRATCH(uint32_t handle)
-    def CMD_SETSCRATCH(self, *args):
-        self.cmd(0x37, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_SKETCH(int16_t x, int16_t y, uint16_t w, uint16_t h, uint32_t ptr, uint16_t format)
-    def CMD_SKETCH(self, *args):
-        self.cmd(0x2c, 'hhHHIHH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_SKIPCOND(uint32_t a, uint32_t func, uint32_t ref, uint32_t mask, uint32_t num)
-    def CMD_SKIPCOND(self, *args):
-        self.cmd(0x8c, 'IIIII', tuple( int(arg) for arg in args ) )
-
-    # CMD_SLIDER(int16_t x, int16_t y, int16_t w, int16_t h, uint16_t options, uint16_t val, uint16_t range)
-    def CMD_SLIDER(self, *args):
-        self.cmd(0x0e, 'hhhhHHHH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_SNAPSHOT(uint32_t ptr)
-    def CMD_SNAPSHOT(self, *args):
-        self.cmd(0x1d, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_SPINNER(int16_t x, int16_t y, uint16_t style, uint16_t scale)
-    def CMD_SPINNER(self, *args):
-        self.cmd(0x14, 'hhHH', tuple( int(arg) for arg in args ) )
-
-    # CMD_STOP()
-    def CMD_STOP(self, *args):
-        self.cmd0(0x15)
-
-    # CMD_SWAP()
-    def CMD_SWAP(self, *args):
-        self.cmd0(0x01)
-
-    # CMD_SYNC()
-    def CMD_SYNC(self, *args):
-        self.cmd0(0x3c)
-
-    # CMD_TESTCARD()
-    def CMD_TESTCARD(self, *args):
-        self.cmd0(0x57)
-
     # CMD_TEXT(int16_t x, int16_t y, int16_t font, uint16_t options, const char* s)
     def CMD_TEXT(self, *args):
         self.cmd(0x0a, 'hhhH', tuple( int(arg) for arg in args[:4] ) )
@@ -1527,41 +1593,22 @@ class EVE2:
         label = (args[6].encode() + b'\xff' + args[7].encode())
         self.fstring((label,) + tuple( int(arg) for arg in args[8:] ) )
 
-    # CMD_TRACK(int16_t x, int16_t y, int16_t w, int16_t h, int16_t tag)
-    def CMD_TRACK(self, *args):
-        self.cmd(0x28, 'hhhhhH', tuple( [ int(arg) for arg in args ] + [0] ) )
-
-    # CMD_TRANSLATE(int32_t tx, int32_t ty)
-    def CMD_TRANSLATE(self, *args):
-        self.cmd(0x24, 'ii', tuple( int(arg) for arg in args ) )
-
-    # CMD_VIDEOFRAME(uint32_t dst, uint32_t ptr)
-    def CMD_VIDEOFRAME(self, *args):
-        self.cmd(0x3b, 'II', tuple( int(arg) for arg in args ) )
-
-    # CMD_VIDEOSTART(uint32_t options)
-    def CMD_VIDEOSTART(self, *args):
-        self.cmd(0x3a, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_WAIT(uint32_t us)
-    def CMD_WAIT(self, *args):
-        self.cmd(0x59, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_WAITCHANGE(uint32_t a)
-    def CMD_WAITCHANGE(self, *args):
-        self.cmd(0x67, 'I', tuple( int(arg) for arg in args ) )
-
-    # CMD_WAITCOND(uint32_t a, uint32_t func, uint32_t ref, uint32_t mask)
-    def CMD_WAITCOND(self, *args):
-        self.cmd(0x78, 'IIII', tuple( int(arg) for arg in args ) )
-
-    # CMD_WATCHDOG(uint32_t init_val)
-    def CMD_WATCHDOG(self, *args):
-        self.cmd(0x83, 'I', tuple( int(arg) for arg in args ) )
-
-    # Extension commands
-
-    # CMD_LOADPATCH(uint32_t options)
-    def CMD_LOADPATCH(self, *args):
-        self.cmd(0x82, 'I', tuple( int(arg) for arg in args ) )
-
+# The display list methods are made from the table in commands.py.
+# On CPython the camel case and upper case names are the same encoder.
+# On CircuitPython the upper case names call the camel case methods of
+# the `_eve` library.
+def _forward(camel):
+    def command(self, *args, **kwargs):
+        getattr(self, camel)(*args, **kwargs)
+    return command
+
+for (camel, name, word, fields, defaults) in DISPLAY_LIST:
+    if implementation.name != "circuitpython":
+        command = display_list(camel, word, fields, defaults, EVE2.FIFO_MAX - 16)
+        setattr(EVE2, camel, command)
+        setattr(EVE2, name, command)
+    else:
+        setattr(EVE2, name, _forward(camel))
+
+for (name, op, fmt) in COPROCESSOR:
+    setattr(EVE2, name, coprocessor(op, fmt))
@@ -11,6 +11,7 @@ from ft4222.SPIMaster import Mode, Clock, SlaveSelect
 from ft4222.GPIO import Port, Dir
 
 import bteve2 as eve
+from bteve2.eve import chunks
 
 class connector():
     # System clock frequency, in Hz
@@ -19,6 +20,8 @@ class connector():
     multi_mode = False
     # Current chip select setting for assertion when accessing SPI when CS is disabled
     curcs = None
+    # GPIO on the second interface connected to the EVE INT_N output.
+    INT_PORT = Port.P3
 
     def __init__(self):
         print("Initialise FT4222 interface")
@@ -39,6 +42,16 @@ class connector():
         # also use gpio
         self.devB.gpio_Init(gpio0 = Dir.OUTPUT)
 
+    # Wait up to timeout seconds for the EVE to assert INT_N (active low).
+    # Returns True if it is asserted.
+    def wait_int(self, timeout):
+        end = time.monotonic() + timeout
+        while self.devB.gpio_Read(self.INT_PORT):
+            if time.monotonic() >= end:
+                return False
+            time.sleep(0.0001)
+        return True
+
     def setup_flash(self):
         pass
 
@@ -52,22 +65,26 @@ class connector():
         return struct.unpack("I", self.rd(a, 4))[0]
         
     def rd(self, a, nn):
+        r = bytearray(nn)
+        self.rd_into(a, memoryview(r))
+        return bytes(r)
+
+    # Read len(buf) bytes into buf, a writable memoryview, in place.
+    def rd_into(self, a, buf):
         assert (a & 3) == 0
+        nn = len(buf)
         assert (nn & 3) == 0
         
         assert self.curcs == True, "CS not enabled for read"
 
-        if nn == 0:
-            return b""
-        a1 = a + nn
-        r = b''
-        while a != a1:
+        p = 0
+        while p != nn:
             # Timeout for a read is 7uS for BT82x.
             # At a 20MHz SPI bus the timeout is approximately 140 clock cycles.
             # On FT4222H the spiMaster_EndTransaction will take 11uS.
             # This is T0 (12.5nS for 80MHz clock) * 880 clocks from Datasheet.
             # Read a maximum of 16 bytes before the "0x01" that signifies data ready.
-            n = min(a1 - a, 0x8000)
+            n = min(nn - p, 0x8000)
             if self.multi_mode:
                 bb = self.devA.spiMaster_MultiReadWrite(b'', self.addr(a), 16 + n)
                 # Read until the "0x01" that signifies data ready.
@@ -75,11 +92,11 @@ class connector():
                     # Got READY byte in response
                     i = bb.index(1)
                     if i >= 16: print(f"Oh dear {i}")
-                    response = bb[i + 1:i + 1 + n]
+                    got = min(n, len(bb) - i - 1)
+                    buf[p:p + got] = memoryview(bb)[i + 1:i + 1 + got]
                 else:
                     # There is no recovery here.
                     print("recover")
-                    response = b''
             else:
                 self.devA.spiMaster_SingleWrite(self.addr(a), False)
                 def recv(n):
@@ -89,45 +106,45 @@ class connector():
                 if 1 in bb:
                     # Got READY byte in response
                     i = bb.index(1)
-                    response = bb[i + 1:i + 1 + n]
+                    got = min(n, len(bb) - i - 1)
+                    buf[p:p + got] = memoryview(bb)[i + 1:i + 1 + got]
                 else:
                     # Recovery: Poll for READY byte
                     while recv(1) == b'\x00':
                         pass
-                    response = b''
+                    got = 0
                 # Handle case of full response not received
-                if len(response) < n:
-                    response += recv(n - len(response))
+                if got < n:
+                    buf[p + got:p + n] = recv(n - got)
                 self.devA.spiMaster_EndTransaction()
             a += n
-            r += response
-        return r
+            p += n
 
     def wr32(self, a, v):
         self.wr(a, struct.pack("I", v))
 
     def wr(self, a, s, inc=True):
+        self.writev(a, [s], inc)
+
+    # Write a list of buffers to consecutive addresses, as if they were
+    # joined. Each transaction is sent from views onto the buffers.
+    def writev(self, a, bufs, inc=True):
         _ = inc
         assert (a & 3) == 0
-        t = len(s)
-        assert (t & 3) == 0
         
         assert self.curcs == True, "CS not enabled for write"
 
-        while t:
-            n = min(0xf000, t)
+        for (parts, n) in chunks(bufs, 0xf000):
+            assert (n & 3) == 0
             if self.multi_mode:
-                self.devA.spiMaster_MultiReadWrite(b'', self.addr(a | (1 << 31)) + s[:n], 0)
+                self.devA.spiMaster_MultiReadWrite(b'', b''.join([self.addr(a | (1 << 31))] + parts), 0)
             else:
                 self.devA.spiMaster_SingleWrite(self.addr(a | (1 << 31)), False)
-                if t > 0:
-                    self.devA.spiMaster_SingleWrite(s[:n], True)
-                else:
-                    self.devA.spiMaster_EndTransaction()
-                    pass
+                # The ft4222 module only accepts a bytes object.
+                last = len(parts) - 1
+                for (i, p) in enumerate(parts):
+                    self.devA.spiMaster_SingleWrite(bytes(p), i == last)
             a += n
-            t -= n
-            s = s[n:]
 
     def cs(self, v):
         if v:
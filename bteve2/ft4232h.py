@@ -20,6 +20,7 @@ from pyftdi.ftdi import Ftdi
 # for the SPI connection details on UMFTPD2A board using the CN2 connector.
 
 import bteve2 as eve
+from bteve2.eve import chunks
 
 class connector():
     # system clock frequency, in Hz
@@ -65,56 +66,66 @@ class connector():
         return struct.unpack("I", self.rd(a, 4))[0]
         
     def rd(self, a, nn):
+        r = bytearray(nn)
+        self.rd_into(a, memoryview(r))
+        return bytes(r)
+
+    # Timout for a read is 7uS for BT82x.
+    # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
+    # Read a maximum of 16 bytes before the "0x01" that signifies data ready.
+    DUMMY = 16
+
+    # Read len(buf) bytes into buf, a writable memoryview, in place.
+    # The address, the dummy bytes and the data are one SpiPort.exchange,
+    # which pyftdi sends as a single MPSSE command buffer.
+    def rd_into(self, a, buf):
         assert (a & 3) == 0
+        nn = len(buf)
         assert (nn & 3) == 0
 
         assert self.curcs == True, "CS not enabled for read"
 
-        if nn == 0:
-            return b""
-        a1 = a + nn
-        r = b''
-        while a != a1:
-            # Timout for a read is 7uS for BT82x.
-            # At a 20MHz SPI bus the timout is approximately 140 clock cycles.
-            # Read a maximum of 16 bytes before the "0x01" that signifies data ready.
-            n = min(a1 - a, 0x8000)
-            self.slave.write(self.addr(a), start = True, stop = False)
-            def recv(n):
-                return self.slave.read(n, start = False, stop = False)
-            bb = recv(16 + n)
+        p = 0
+        while p != nn:
+            n = min(nn - p, 0x8000)
+            bb = self.slave.exchange(self.addr(a), self.DUMMY + n, start = True, stop = True)
             # Read until the "0x01" that signifies data ready.
-            if 1 in bb:             # Got READY byte in response
-                i = bb.index(1)
-                response = bb[i + 1:i + 1 + n]
+            i = bb.find(1, 0, self.DUMMY)
+            if i >= 0:              # Got READY byte in response
+                buf[p:p + n] = memoryview(bb)[i + 1:i + 1 + n]
             else:
-                                    # Poll for READY byte
-                while recv(1) == b'\x00':
-                    pass
-                response = b''
-                                    # Handle case of full response not received
-            if len(response) < n:
-                response += recv(n - len(response))
-            self.slave.write(b'', start = False, stop = True)
+                                    # Read again, polling for READY byte
+                self.rd_poll(a, buf[p:p + n])
             a += n
-            r += response
-        return r
+            p += n
+
+    # Read into buf when the READY byte is late, polling for it one byte
+    # at a time.
+    def rd_poll(self, a, buf):
+        self.slave.write(self.addr(a), start = True, stop = False)
+        def recv(n):
+            return self.slave.read(n, start = False, stop = False)
+        while recv(1) == b'\x00':
+            pass
+        buf[:] = recv(len(buf))
+        self.slave.write(b'', start = False, stop = True)
 
     def wr(self, a, s, inc=True):
+        self.writev(a, [s], inc)
+
+    # Write a list of buffers to consecutive addresses, as if they were
+    # joined. pyftdi sends one buffer per transaction, so only each 4kB
+    # burst is gathered from views onto the buffers.
+    def writev(self, a, bufs, inc=True):
         assert (a & 3) == 0
-        t = len(s)
-        assert (t & 3) == 0
 
         assert self.curcs == True, "CS not enabled for write"
 
-        while t:
-            # Write in 4kB bursts
-            n = min(0x1000, t)
-            self.slave.write(self.addr(a | (1 << 31)) + s[:n], start = True, stop = True)
+        for (parts, n) in chunks(bufs, 0x1000):
+            assert (n & 3) == 0
+            self.slave.write(b''.join([self.addr(a | (1 << 31))] + parts), start = True, stop = True)
             if inc: 
                 a += n
-            t -= n
-            s = s[n:]
 
     def cs(self, v):
         if v:
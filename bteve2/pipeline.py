@@ -0,0 +1,131 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import threading
+import queue
+
+# Send the command buffer to the EVE device from a background thread.
+# When the pipeline is running flush() hands the full buffer to the
+# transfer thread and the application continues to add commands to a
+# second buffer. flush() only waits when both buffers are in use.
+#
+# Transactions on the connector are made under a lock held from cs(True)
+# to cs(False), so register reads and writes from the application are
+# not mixed with command buffer transfers.
+#
+# sync() waits for all buffers to be sent. finish() and previous() call
+# it before reading the co-processor state. Errors from the transfer
+# thread, such as a CoprocessorException, are raised by the next flush()
+# or sync().
+#
+# The transfer thread needs the GIL between USB transactions, so the
+# overlap is best when the application work releases it, as large NumPy
+# operations do.
+
+class Pipeline:
+
+    def __init__(self, eve):
+        self.eve = eve
+        self.lock = threading.RLock()
+        self.pending = queue.Queue()
+        self.spare = queue.Queue()
+        self.spare.put(bytearray(len(eve.buf)))
+        self.error = None
+        # Number of bytes flushed, including the buffers not yet sent.
+        self.queued = eve.sent
+
+        # Wrap the connector methods so that each transaction is locked.
+        self.connector = (eve.cs, eve.rd, eve.rd_into, eve.wr, eve.writev, eve.transfer)
+        (cs, rd, rd_into, wr, writev, transfer) = self.connector
+        lock = self.lock
+        def locked_cs(v):
+            if v:
+                lock.acquire()
+                cs(v)
+            else:
+                cs(v)
+                lock.release()
+        def locked_rd(a, n):
+            with lock:
+                return rd(a, n)
+        def locked_rd_into(a, buf):
+            with lock:
+                rd_into(a, buf)
+        def locked_wr(a, s, inc = True):
+            with lock:
+                wr(a, s, inc)
+        def locked_writev(a, bufs, inc = True):
+            with lock:
+                writev(a, bufs, inc)
+        def locked_transfer(ops):
+            with lock:
+                return transfer(ops)
+        eve.cs = locked_cs
+        eve.rd = locked_rd
+        eve.rd_into = locked_rd_into
+        eve.wr = locked_wr
+        eve.writev = locked_writev
+        eve.transfer = locked_transfer
+        eve.flush = self.flush
+        eve.sync = self.sync
+
+        self.thread = threading.Thread(target = self.run, name = "EVE transfer", daemon = True)
+        self.thread.start()
+
+    # Transfer thread. Buffers are sent in the order they were flushed.
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                self.pending.task_done()
+                break
+            (buf, n) = item
+            try:
+                if self.error is None:
+                    self.eve.write(memoryview(buf)[:n])
+            except Exception as e:
+                self.error = e
+            finally:
+                self.spare.put(buf)
+                self.pending.task_done()
+
+    def check(self):
+        if self.error is not None:
+            e = self.error
+            self.error = None
+            raise e
+
+    # Hand the command buffer to the transfer thread and continue with
+    # the spare buffer.
+    def flush(self):
+        self.check()
+        eve = self.eve
+        if eve.bufptr:
+            eve.keep_results(eve.bufptr)
+            buf = eve.buf
+            n = eve.bufptr
+            eve.buf = self.spare.get()
+            eve.bufptr = 0
+            self.queued += n
+            self.pending.put((buf, n))
+
+    # Wait until a spare buffer is free, so that flush() does not wait.
+    def wait_spare(self):
+        self.spare.put(self.spare.get())
+
+    # Wait for all buffers to be sent to the EVE device.
+    def sync(self):
+        self.pending.join()
+        self.check()
+
+    # Send any remaining commands, stop the transfer thread and restore
+    # the synchronous methods.
+    def stop(self):
+        self.flush()
+        self.pending.put(None)
+        self.thread.join()
+        eve = self.eve
+        (eve.cs, eve.rd, eve.rd_into, eve.wr, eve.writev, eve.transfer) = self.connector
+        del eve.flush
+        del eve.sync
+        eve.pipeline = None
+        self.check()
@@ -0,0 +1,108 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import os
+import zlib
+import struct
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .eve import align4
+
+# Prepare images for the EVE in worker processes.
+# Each image is opened, resized, converted to a bitmap format and
+# compressed in a process pool. The results are returned in order, so the
+# application sends each image to the device while the later ones are
+# still being prepared.
+#
+#   jobs = [Job("a.png", eve.FORMAT_RGB565, (1024, 800)), Job("b.png", eve.FORMAT_RGB565, (1024, 800))]
+#   for (addr, image) in zip((addr_a, addr_b), prepare(jobs)):
+#       upload(eve, image, addr)
+#
+# Prepared images are kept in a cache directory, keyed by the path and
+# modification time of the file and the parameters of the job.
+# This module needs PIL and NumPy.
+
+# An image file to prepare. size is (w, h) to resize to, or None.
+# level is the zlib compression level, 0 for no compression.
+Job = namedtuple("Job", ("path", "fmt", "size", "dither", "level"), defaults = (None, False, 9))
+
+# A prepared image. data is compressed when level is not 0.
+Prepared = namedtuple("Prepared", ("fmt", "w", "h", "level", "data"))
+
+def run(job):
+    from PIL import Image
+    from .convert import convert
+    im = Image.open(job.path)
+    if job.size is not None:
+        im = im.resize(job.size)
+    data = convert(im, job.fmt, job.dither)
+    if job.level:
+        data = zlib.compress(data, job.level)
+    return Prepared(job.fmt, im.size[0], im.size[1], job.level, data)
+
+def cachefile(cache, job):
+    st = os.stat(job.path)
+    key = repr((os.path.abspath(job.path), st.st_mtime_ns, st.st_size, tuple(job[1:])))
+    return os.path.join(cache, hashlib.sha1(key.encode()).hexdigest() + ".bin")
+
+# A cache file is a header of the magic bytes, fmt, w, h, level and the
+# length of the data, followed by the data.
+HEADER = struct.Struct("<4sIIIII")
+MAGIC = b"EVE1"
+
+# Return the Prepared in a cache file, or None if it is missing or is not
+# a complete cache file.
+def load(fn):
+    try:
+        with open(fn, "rb") as f:
+            s = f.read()
+    except OSError:
+        return None
+    if len(s) < HEADER.size:
+        return None
+    (magic, fmt, w, h, level, n) = HEADER.unpack_from(s)
+    if magic != MAGIC or len(s) != HEADER.size + n:
+        return None
+    return Prepared(fmt, w, h, level, s[HEADER.size:])
+
+def store(fn, prepared):
+    tmp = fn + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, prepared.fmt, prepared.w, prepared.h, prepared.level, len(prepared.data)))
+        f.write(prepared.data)
+    os.replace(tmp, fn)
+
+# Yield a Prepared for each job in order. Jobs which are not in the cache
+# are run in a pool of worker processes.
+def prepare(jobs, workers = None, cache = ".evecache"):
+    jobs = list(jobs)
+    if cache is not None:
+        os.makedirs(cache, exist_ok = True)
+        files = [cachefile(cache, job) for job in jobs]
+        cached = [load(fn) for fn in files]
+    else:
+        files = [None] * len(jobs)
+        cached = [None] * len(jobs)
+    todo = [job for (job, c) in zip(jobs, cached) if c is None]
+    if not todo:
+        yield from cached
+        return
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        futures = iter([pool.submit(run, job) for job in todo])
+        for (fn, c) in zip(files, cached):
+            if c is None:
+                c = next(futures).result()
+                if fn is not None:
+                    store(fn, c)
+            yield c
+
+# Send a prepared image to RAM_G, through CMD_INFLATE when it is
+# compressed.
+def upload(eve, prepared, address):
+    if prepared.level:
+        eve.CMD_INFLATE(address, 0)
+        eve.cc(align4(prepared.data))
+    else:
+        eve.CMD_MEMWRITE(address, len(prepared.data))
+        eve.cc(align4(prepared.data))
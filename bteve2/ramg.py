@@ -0,0 +1,116 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+from collections import namedtuple
+
+# Allocate areas of RAM_G from the host.
+# The free areas are kept in a list sorted by address. An allocation
+# takes the smallest free area that fits with the requested alignment,
+# and a freed area is merged with the free areas either side of it.
+#
+#   ramg = Allocator(0, eve.ramgtop)
+#   addr = ramg.alloc(1280 * 720 * 2, 128, "background")
+#   ...
+#   ramg.free("background")
+#
+# apprunner makes an allocator for the memory below the swapchain as
+# eve.ramg.
+
+Usage = namedtuple(
+    "Usage",
+    (
+    "size",          # Bytes managed
+    "used",          # Bytes allocated, including alignment padding
+    "free",          # Bytes free
+    "largest",       # Largest free area
+    "areas",         # Number of free areas
+    "allocations",   # Number of allocations
+    "fragmentation", # 1 - largest / free, 0 when the free memory is in one area
+    ))
+
+class Allocator:
+
+    # Alignment used when none is given, and the alignment of all sizes.
+    ALIGN = 4
+
+    def __init__(self, base, size):
+        self.base = base
+        self.size = size
+        # Free areas as [address, size] sorted by address.
+        self.areas = [[base, size]]
+        # Allocations by name as (address, size, start) where start is the
+        # address of the area including the alignment padding.
+        self.allocations = {}
+
+    def __contains__(self, name):
+        return name in self.allocations
+
+    # Return the address of a named allocation.
+    def __getitem__(self, name):
+        return self.allocations[name][0]
+
+    # Allocate size bytes aligned to align bytes, which must be a power of
+    # two such as 4, 16, 64 or 128. If a name is not given the address is
+    # used as the name. Returns the address.
+    def alloc(self, size, align = ALIGN, name = None):
+        assert align >= self.ALIGN and (align & (align - 1)) == 0, "Alignment must be a power of two"
+        assert name not in self.allocations, "Allocation name already in use"
+        size = (size + self.ALIGN - 1) & ~(self.ALIGN - 1)
+        best = None
+        for (i, (a, n)) in enumerate(self.areas):
+            pad = -a & (align - 1)
+            if (pad + size <= n) and ((best is None) or (n < self.areas[best][1])):
+                best = i
+        if best is None:
+            raise MemoryError("No free area of RAM_G for %d bytes" % size)
+        (start, n) = self.areas[best]
+        addr = start + (-start & (align - 1))
+        end = addr + size
+        if end == start + n:
+            del self.areas[best]
+        else:
+            self.areas[best] = [end, start + n - end]
+        if name is None:
+            name = addr
+        self.allocations[name] = (addr, size, start)
+        return addr
+
+    # Free an allocation given by name, or by address for allocations made
+    # without a name.
+    def free(self, name):
+        (addr, size, start) = self.allocations.pop(name)
+        end = addr + size
+        i = 0
+        while (i < len(self.areas)) and (self.areas[i][0] < start):
+            i += 1
+        # Merge with the free areas before and after.
+        if (i < len(self.areas)) and (self.areas[i][0] == end):
+            end += self.areas[i][1]
+            del self.areas[i]
+        if (i > 0) and (sum(self.areas[i - 1]) == start):
+            self.areas[i - 1][1] = end - self.areas[i - 1][0]
+        else:
+            self.areas.insert(i, [start, end - start])
+
+    # Free all the allocations.
+    def reset(self):
+        self.areas = [[self.base, self.size]]
+        self.allocations = {}
+
+    def usage(self):
+        free = sum(n for (a, n) in self.areas)
+        largest = max([n for (a, n) in self.areas] + [0])
+        return Usage(
+            self.size,
+            self.size - free,
+            free,
+            largest,
+            len(self.areas),
+            len(self.allocations),
+            (1 - largest / free) if free else 0.0)
+
+    # Print the usage and the allocations in address order.
+    def report(self):
+        u = self.usage()
+        print(f"RAM_G {u.used} of {u.size} bytes used, {u.free} free in {u.areas} areas, largest {u.largest}, fragmentation {u.fragmentation:.1%}")
+        for (name, (addr, size, start)) in sorted(self.allocations.items(), key = lambda x: x[1][0]):
+            print(f"  {addr:08x} {size:10d} {name}")
@@ -0,0 +1,125 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+# Record the encoded commands of a frame into a template.
+# A template is replayed by copying it into the command buffer in one
+# block. Commands recorded with slot() can be given new parameters at
+# each replay, only those commands are encoded again.
+#
+#   with eve.record() as frame:
+#       eve.CMD_DLSTART()
+#       eve.CLEAR()
+#       frame.slot("value", eve.CMD_GAUGE, 200, 200, 100, 0, 5, 4, 0, 100, index=6)
+#       frame.slot("label", eve.CMD_TEXT, 200, 320, 30, eve.OPT_CENTER, "0", index=4)
+#       eve.DISPLAY()
+#       eve.CMD_SWAP()
+#
+#   frame.replay(value=42, label="42")
+#
+# When eve.elide is set, a replayed template which starts with
+# CMD_DLSTART is a frame which can be elided, like one made with the
+# commands themselves.
+
+class Slot:
+
+    def __init__(self, command, args, index, offset, size):
+        self.command = command
+        self.args = list(args)
+        self.index = index
+        self.offset = offset
+        self.size = size
+
+class Template:
+
+    def __init__(self, eve):
+        self.eve = eve
+        self.data = bytearray()
+        self.slots = {}
+        self.recording = False
+        self.scratch = None
+
+    # Commands are encoded into a spare buffer while recording. They are
+    # not sent to the EVE device.
+    def __enter__(self):
+        eve = self.eve
+        self.saved = (eve.buf, eve.bufptr)
+        eve.buf = bytearray(len(eve.buf))
+        eve.bufptr = 0
+        # Full buffers are added to the template instead of being sent.
+        self.flush = eve.__dict__.get("flush")
+        eve.flush = self._capture
+        # Commands recorded are not a frame in the command buffer.
+        self.frame = eve.frame
+        self.recording = True
+        return self
+
+    def __exit__(self, *exc):
+        eve = self.eve
+        self._capture()
+        if self.flush is None:
+            del eve.flush
+        else:
+            eve.flush = self.flush
+        (eve.buf, eve.bufptr) = self.saved
+        eve.frame = self.frame
+        self.recording = False
+        return False
+
+    def _capture(self):
+        eve = self.eve
+        self.data += eve.buf[:eve.bufptr]
+        eve.bufptr = 0
+
+    # Add a command to the template which can be given new parameters
+    # when the template is replayed. If index is given then the replay
+    # value replaces that parameter, otherwise the replay value is a
+    # sequence of all the parameters of the command.
+    def slot(self, name, command, *args, index = None):
+        assert self.recording, "Slots can only be added while recording"
+        offset = len(self.data) + self.eve.bufptr
+        command(*args)
+        size = len(self.data) + self.eve.bufptr - offset
+        self.slots[name] = Slot(command, args, index, offset, size)
+
+    # Encode a command into a scratch buffer and return the bytes.
+    def _encode(self, command, args):
+        eve = self.eve
+        saved = (eve.buf, eve.bufptr)
+        if self.scratch is None:
+            self.scratch = bytearray(len(eve.buf))
+        eve.buf = self.scratch
+        eve.bufptr = 0
+        try:
+            command(*args)
+            return eve.buf[:eve.bufptr]
+        finally:
+            (eve.buf, eve.bufptr) = saved
+
+    # Change the parameters of slots in the template.
+    # The template keeps the new values for later replays.
+    def update(self, **values):
+        for (name, value) in values.items():
+            s = self.slots[name]
+            if s.index is None:
+                s.args = list(value)
+            else:
+                s.args[s.index] = value
+            encoded = self._encode(s.command, s.args)
+            size = len(encoded)
+            self.data[s.offset:s.offset + s.size] = encoded
+            if size != s.size:
+                # Strings may change the length of a command. Move the
+                # slots that follow it.
+                for t in self.slots.values():
+                    if t.offset > s.offset:
+                        t.offset += size - s.size
+                s.size = size
+
+    # Add the template to the command buffer after changing the
+    # parameters of any slots given.
+    def replay(self, **values):
+        if values:
+            self.update(**values)
+        eve = self.eve
+        if eve.elide and self.data[:4] == b'\x00\xff\xff\xff':
+            eve.frame = (eve.flushed(), eve.bufptr)
+        eve.cc(self.data)
@@ -0,0 +1,123 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import os
+import time
+import zlib
+
+from .eve import align4
+
+# Send data to RAM_G in the way that is expected to take the least time.
+# Data can be sent raw with CMD_MEMWRITE, or compressed with zlib at
+# level 1 or 9 and expanded by CMD_INFLATE. measure() times the link, the
+# host zlib compression and the co-processor inflate, then send() picks
+# the quickest way for each block of data from its sampled compression
+# ratio. Each decision is printed.
+#
+#   up = Uploader(eve)
+#   up.measure(scratch)
+#   up.send(data, address)
+#
+# measure() is called by the first send() if it has not been, using a
+# scratch area from eve.ramg.
+
+class Uploader:
+
+    # Amount of data used to time the link and inflate.
+    TEST_SIZE = 256 * 1024
+    # Amount of data compressed to estimate the compression ratio.
+    SAMPLE_SIZE = 64 * 1024
+    LEVELS = (1, 9)
+
+    def __init__(self, eve, verbose = True):
+        self.eve = eve
+        self.verbose = verbose
+        # Bytes per second of the link, of CMD_INFLATE output, and of the
+        # host compression at each level.
+        self.link = None
+        self.inflate = None
+        self.deflate = {}
+
+    def timed(self, fn, *args):
+        t0 = time.monotonic()
+        fn(*args)
+        return max(time.monotonic() - t0, 1e-6)
+
+    # Time each part of an upload. TEST_SIZE bytes of RAM_G at the scratch
+    # address are overwritten. Without a scratch address an area is
+    # allocated from eve.ramg for the measurement.
+    def measure(self, scratch = None):
+        if scratch is not None:
+            self.timings(scratch)
+            return
+        ramg = getattr(self.eve, "ramg", None)
+        if ramg is None:
+            raise ValueError("measure() needs a scratch address when there is no eve.ramg")
+        scratch = ramg.alloc(self.TEST_SIZE)
+        try:
+            self.timings(scratch)
+        finally:
+            ramg.free(scratch)
+
+    def timings(self, scratch):
+        eve = self.eve
+        n = self.TEST_SIZE
+        eve.finish()
+        data = os.urandom(n)
+        def raw():
+            eve.CMD_MEMWRITE(scratch, n)
+            eve.cc(data)
+            eve.finish()
+        self.link = n / self.timed(raw)
+
+        # Zeros compress to almost nothing, so this is the inflate time.
+        zeros = zlib.compress(bytes(n), 9)
+        def inflate():
+            eve.CMD_INFLATE(scratch, 0)
+            eve.cc(align4(zeros))
+            eve.finish()
+        self.inflate = n / self.timed(inflate)
+
+        sample = self.sample_data()
+        for level in self.LEVELS:
+            self.deflate[level] = len(sample) / self.timed(zlib.compress, sample, level)
+        if self.verbose:
+            print(f"Upload link {self.link / 1e6:.2f} MB/s, inflate {self.inflate / 1e6:.2f} MB/s, " +
+                  ", ".join(f"zlib-{l} {r / 1e6:.2f} MB/s" for (l, r) in self.deflate.items()))
+
+    # Typical image data for timing the host compression.
+    def sample_data(self):
+        return bytes(range(256)) * (self.SAMPLE_SIZE // 512) + os.urandom(self.SAMPLE_SIZE // 2)
+
+    # Return the estimated time for each way of sending the data, as a
+    # dictionary keyed by zlib level, with 0 for raw. The co-processor
+    # inflates while the compressed data is arriving, so the slower of the
+    # two is counted.
+    def estimate(self, data):
+        n = len(data)
+        times = {0: n / self.link}
+        sample = data[:self.SAMPLE_SIZE]
+        for level in self.LEVELS:
+            ratio = len(zlib.compress(sample, level)) / max(1, len(sample))
+            times[level] = n / self.deflate[level] + max(n * ratio / self.link, n / self.inflate)
+        return times
+
+    # Send the data to RAM_G at address and return the zlib level used, 0
+    # when it was sent raw.
+    def send(self, data, address):
+        eve = self.eve
+        if self.link is None:
+            self.measure()
+        times = self.estimate(data)
+        level = min(times, key = times.get)
+        if self.verbose:
+            print(f"Upload {len(data)} bytes to {address:x}: " +
+                  ", ".join(f"{'raw' if l == 0 else 'zlib-%d' % l} {t * 1e3:.1f} ms" for (l, t) in times.items()) +
+                  f" -> {'raw' if level == 0 else 'zlib-%d' % level}")
+        if level == 0:
+            data = align4(data)
+            eve.CMD_MEMWRITE(address, len(data))
+            eve.cc(data)
+        else:
+            eve.CMD_INFLATE(address, 0)
+            eve.cc(align4(zlib.compress(data, level)))
+        return level
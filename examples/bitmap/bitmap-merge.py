@@ -1,84 +1,17 @@
 # Typical command line:
 # python bitmap-merge.py --connector ft4222module
 import sys
-from PIL import Image
-import numpy as np
-import zlib
 
 # Add the library directories to the module search path.
 sys.path.append('../..')
 sys.path.append('../../bteve2')
 
 import bteve2
+from bteve2.prepare import Job, prepare, upload
 
 # This module provides the connector to the EVE hardware.
 import apprunner
 
-def pad4(s):
-    while len(s) % 4:
-        s += b'\x00'
-    return s
-
-def iload(self, a, plain):
-    self.CMD_INFLATE(a, 0)
-    self.cc(pad4(zlib.compress(plain)))
-
-def dith(w, h):
-    return np.tile(np.concatenate((
-        np.tile(np.array([0, 2]), (w+1) // 2)[:w],
-        np.tile(np.array([3, 1]), (w+1) // 2)[:w]
-    )), (h+1) // 2)[:w*h]
-
-def convert(eve, im, fmt, dither = False):
-    colorfmts = {
-        eve.FORMAT_RGB565 :   (0, 5, 6, 5)
-    }
-
-    dd = dith(*im.size)
-    sizes = colorfmts[fmt][::-1]
-    bpp = sum(sizes)
-    cs = [np.frombuffer(c.tobytes(), np.uint8).astype(np.uint32) for c in im.split()]
-
-    xswiz = {
-        1: 7,
-        2: 3,
-        4: 1,
-    }.get(bpp, 0)
-
-    # Arrange as B, G, R, A
-    (b, g, r, a) = (0, 0, 0, 0)
-    if im.mode in ("L", "P"):
-        (b,) = cs
-    elif im.mode == "LA":
-        (b, a) = cs
-    elif im.mode == "RGB":
-        (r, g, b) = cs
-    elif im.mode == "RGBA":
-        (r, g, b, a) = cs
-    cs = [b, g, r, a]
-    p = 0
-    w = np.zeros_like(cs[0], dtype=np.uint32)  # Ensure w is uint32
-    for c, s in zip(cs, sizes):
-        df = dither * {1: 32, 2: 16, 3: 8, 4: 4, 5: 2, 6: 1}.get(s, 0)
-        dc = np.minimum(255, c + df * dd).astype(np.uint32)
-        w |= (dc >> (8 - s)) << p
-        p += s
-
-    nb = bpp * len(w)
-    indices = np.arange(nb, dtype=np.uint32)
-
-    # Ensure indices are valid and of the correct type
-    wi = ((indices // bpp) ^ xswiz).astype(np.uint32)
-    wb = (indices % bpp).astype(np.uint32)
-
-    # Use numpy's advanced indexing instead of take
-    res = ((w[wi] >> wb) & 1).astype(np.uint32)
-
-    bits = indices.astype(np.uint8) & 7
-    bb = (res << bits).reshape((len(indices) // 8, 8)).sum(1).astype(np.uint8).tobytes()
-
-    return bb
-
 def oe_merge(eve, dst, src0, src1, mask):
     # Draw mask bitmap in RAM
     eve.CMD_MEMWRITE(mask.addr, 4)
@@ -116,10 +49,9 @@ def oe_merge(eve, dst, src0, src1, mask):
 
 def bitmap_merge(eve):
     (w, h) = (1024, 800)
-    im0 = Image.open("assets/oe_A.png").resize((w, h))
-    im1 = Image.open("assets/oe_B.png").resize((w, h))
-
     fmt = eve.FORMAT_RGB565
+    # Both images are resized and converted in worker processes.
+    jobs = [Job("assets/oe_A.png", fmt, (w, h)), Job("assets/oe_B.png", fmt, (w, h))]
     block_addr = 0x400000       # allocate 4MB per block
     src0 = bteve2.Surface(block_addr * 1, fmt, w, h)
     src1 = bteve2.Surface(block_addr * 2, fmt, w, h)
@@ -127,8 +59,8 @@ def bitmap_merge(eve):
     mask = bteve2.Surface(block_addr * 4, eve.FORMAT_L8, 2, 1)
 
     eve.LIB_BeginCoProList()
-    iload(eve, src0.addr, convert(eve, im0, fmt))
-    iload(eve, src1.addr, convert(eve, im1, fmt))
+    for (src, image) in zip((src0, src1), prepare(jobs)):
+        upload(eve, image, src.addr)
 
     oe_merge(eve, dst, src0, src1, mask)
     eve.CMD_GRAPHICSFINISH()
@@ -147,4 +79,7 @@ def bitmap_merge(eve):
     eve.LIB_EndCoProList()
     eve.LIB_AwaitCoProEmpty()
 
-apprunner.run(bitmap_merge)
+# Worker processes import this file, so only run the application from
+# the main process.
+if __name__ == "__main__":
+    apprunner.run(bitmap_merge)
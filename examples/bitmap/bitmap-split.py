@@ -2,83 +2,18 @@
 # python bitmap-split.py --connector ft4222module
 import sys
 from PIL import Image
-import numpy as np
-import zlib
 
 # Add the library directories to the module search path.
 sys.path.append('../..')
 sys.path.append('../../bteve2')
 
 import bteve2
+from bteve2.convert import convert
+from bteve2.uploader import Uploader
 
 # This module provides the connector to the EVE hardware.
 import apprunner
 
-def pad4(s):
-    while len(s) % 4:
-        s += b'\x00'
-    return s
-
-def iload(self, a, plain):
-    self.CMD_INFLATE(a, 0)
-    self.cc(pad4(zlib.compress(plain)))
-
-def dith(w, h):
-    return np.tile(np.concatenate((
-        np.tile(np.array([0, 2]), (w+1) // 2)[:w],
-        np.tile(np.array([3, 1]), (w+1) // 2)[:w]
-    )), (h+1) // 2)[:w*h]
-
-def convert(eve, im, fmt, dither = False):
-    colorfmts = {
-        eve.FORMAT_RGB565 :   (0, 5, 6, 5)
-    }
-
-    dd = dith(*im.size)
-    sizes = colorfmts[fmt][::-1]
-    bpp = sum(sizes)
-    cs = [np.frombuffer(c.tobytes(), np.uint8).astype(np.uint32) for c in im.split()]
-
-    xswiz = {
-        1: 7,
-        2: 3,
-        4: 1,
-    }.get(bpp, 0)
-
-    # Arrange as B, G, R, A
-    (b, g, r, a) = (0, 0, 0, 0)
-    if im.mode in ("L", "P"):
-        (b,) = cs
-    elif im.mode == "LA":
-        (b, a) = cs
-    elif im.mode == "RGB":
-        (r, g, b) = cs
-    elif im.mode == "RGBA":
-        (r, g, b, a) = cs
-    cs = [b, g, r, a]
-    p = 0
-    w = np.zeros_like(cs[0], dtype=np.uint32)  # Ensure w is uint32
-    for c, s in zip(cs, sizes):
-        df = dither * {1: 32, 2: 16, 3: 8, 4: 4, 5: 2, 6: 1}.get(s, 0)
-        dc = np.minimum(255, c + df * dd).astype(np.uint32)
-        w |= (dc >> (8 - s)) << p
-        p += s
-
-    nb = bpp * len(w)
-    indices = np.arange(nb, dtype=np.uint32)
-
-    # Ensure indices are valid and of the correct type
-    wi = ((indices // bpp) ^ xswiz).astype(np.uint32)
-    wb = (indices % bpp).astype(np.uint32)
-
-    # Use numpy's advanced indexing instead of take
-    res = ((w[wi] >> wb) & 1).astype(np.uint32)
-
-    bits = indices.astype(np.uint8) & 7
-    bb = (res << bits).reshape((len(indices) // 8, 8)).sum(1).astype(np.uint8).tobytes()
-
-    return bb
-
 def oe_split(eve, dst0, dst1, src):
     eve.CMD_RENDERTARGET(*dst0)
     eve.CMD_SETBITMAP(*src)
@@ -110,7 +45,11 @@ def bitmap_split(eve):
     dst1 = bteve2.Surface(block_addr * 2, src.fmt, w, h)
 
     eve.LIB_BeginCoProList()
-    iload(eve, src.addr, convert(eve, im0, src.fmt))
+    # Sent raw or compressed, whichever is quicker on this connector. The
+    # source surface is overwritten anyway, so it is used for measuring.
+    up = Uploader(eve)
+    up.measure(src.addr)
+    up.send(convert(im0, src.fmt), src.addr)
 
     oe_split(eve, dst0, dst1, src)
     eve.CMD_GRAPHICSFINISH()
@@ -0,0 +1,91 @@
+# Typical command line:
+# python convert-timing.py
+#
+# Time bteve2.convert against the convert() these examples used before,
+# on a 1920x1080 RGB image. No EVE device is needed. The peak memory is
+# from tracemalloc.
+import sys
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+# Add the library directories to the module search path.
+sys.path.append('../..')
+sys.path.append('../../bteve2')
+
+import bteve2
+from bteve2.convert import convert
+
+def dith(w, h):
+    return np.tile(np.concatenate((
+        np.tile(np.array([0, 2]), (w+1) // 2)[:w],
+        np.tile(np.array([3, 1]), (w+1) // 2)[:w]
+    )), (h+1) // 2)[:w*h]
+
+# The previous convert(), with the channel sizes given instead of a format.
+def old_convert(im, sizes, dither = False):
+    dd = dith(*im.size)
+    sizes = sizes[::-1]
+    bpp = sum(sizes)
+    cs = [np.frombuffer(c.tobytes(), np.uint8).astype(np.uint32) for c in im.split()]
+
+    xswiz = {
+        1: 7,
+        2: 3,
+        4: 1,
+    }.get(bpp, 0)
+
+    # Arrange as B, G, R, A
+    (b, g, r, a) = (0, 0, 0, 0)
+    if im.mode in ("L", "P"):
+        (b,) = cs
+    elif im.mode == "LA":
+        (b, a) = cs
+    elif im.mode == "RGB":
+        (r, g, b) = cs
+    elif im.mode == "RGBA":
+        (r, g, b, a) = cs
+    cs = [b, g, r, a]
+    p = 0
+    w = np.zeros_like(cs[0], dtype=np.uint32)
+    for c, s in zip(cs, sizes):
+        df = dither * {1: 32, 2: 16, 3: 8, 4: 4, 5: 2, 6: 1}.get(s, 0)
+        dc = np.minimum(255, c + df * dd).astype(np.uint32)
+        w |= (dc >> (8 - s)) << p
+        p += s
+
+    nb = bpp * len(w)
+    indices = np.arange(nb, dtype=np.uint32)
+    wi = ((indices // bpp) ^ xswiz).astype(np.uint32)
+    wb = (indices % bpp).astype(np.uint32)
+    res = ((w[wi] >> wb) & 1).astype(np.uint32)
+    bits = indices.astype(np.uint8) & 7
+    return (res << bits).reshape((len(indices) // 8, 8)).sum(1).astype(np.uint8).tobytes()
+
+def timed(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    r = fn(*args)
+    t = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (r, t, peak)
+
+def main():
+    rng = np.random.default_rng(1)
+    im = Image.fromarray(rng.integers(0, 256, (1080, 1920, 3), dtype = np.uint8))
+    eve = bteve2.EVE2
+    cases = (
+        ("RGB565", im, eve.FORMAT_RGB565, (0, 5, 6, 5), False),
+        ("RGB565 dither", im, eve.FORMAT_RGB565, (0, 5, 6, 5), True),
+        ("L1", im.convert("L"), eve.FORMAT_L1, (0, 0, 0, 1), False),
+        )
+    for (name, src, fmt, sizes, dither) in cases:
+        (old, t0, m0) = timed(old_convert, src, sizes, dither)
+        (new, t1, m1) = timed(convert, src, fmt, dither)
+        same = "same" if old == new else "DIFFERENT"
+        print(f"{name:14} old {t0:.3f} s, peak {m0 / 1e6:.1f} MB   new {t1:.3f} s, peak {m1 / 1e6:.1f} MB   {same}")
+
+if __name__ == "__main__":
+    main()
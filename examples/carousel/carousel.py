@@ -104,18 +104,19 @@ def eve_display(eve):
         eve.LIB_EndCoProList()
         eve.LIB_AwaitCoProEmpty()
 
+        # Both results are read after one wait for the co-processor.
         eve.LIB_BeginCoProList()
-        props = eve.LIB_GetProps()
+        props = eve.CMD_GETPROPS_async()
+        next = eve.CMD_GETPTR_async()
+        eve.LIB_EndCoProList()
 
+        props = props.result()
         (ptr, width, height) = props
         print(f"Get Props for {imagelist[counter]} ptr = {ptr:x} width {width} height {height}")
         if width > 0 and height > 0:
             imageprops.append(props)
 
-        eve.LIB_BeginCoProList()
-        next = eve.LIB_GetPtr()
-        
-        address = next
+        address = next.result()
 
     if len(imageprops) == 0:
         error_screen(eve, "No valid image files on disk")
@@ -14,6 +14,7 @@ sys.path.append('../snippets')
 
 # This module provides the connector to the EVE hardware.
 import apprunner
+from bteve2.assets import AssetCache
 # Import the patch file required by this code.
 import patch_entrybot as patch
 
@@ -117,6 +118,9 @@ def eve_display(eve):
     # This must be installed in RAM_G memory before the details of the font
     # are read as it may be a relocatable file which is compressed in the 
     # font resource file.
+    # Fonts and images still in RAM_G from the last run are not sent again.
+    cache = AssetCache(eve)
+
     for fh, fn in fontfiles:
         print(f"Load font {fn} as handle {fh}...")
         try:
@@ -147,8 +151,7 @@ def eve_display(eve):
             faddr = eve.LIB_MemoryMalloc((len(fontdata) + 64))
             print(f"Fixed Font address: 0x{faddr:x} 0x{len(fontdata):x} - warning the offset of the must must match EAB")
             # Load normal assets in place directly.
-            eve.CMD_INFLATE(faddr, 0)
-            eve.LIB_WriteDataToCMD(pad4(zlib.compress(fontdata)))
+            cache.inflate(zlib.compress(fontdata), faddr)
         # Update the font table with the custom font.
         eve.CMD_SETFONT(fh, faddr, 32)
         eve.CMD_SWAP()
@@ -169,10 +172,9 @@ def eve_display(eve):
         eve.CMD_DLSTART()
         eve.BITMAP_HANDLE(ih)
         for i, iname in enumerate(inames):
-            eve.CMD_LOADIMAGE(iaddr + (i * 256 * 256 * 2) , 0)
             print(iname)
             with open(iname, "rb") as f:
-                eve.load(f)
+                cache.image(f.read(), iaddr + (i * 256 * 256 * 2))
             # Add handle and cell number to image dictionary.
             dictname, _ = os.path.splitext(os.path.basename(iname))
             imagecell[dictname] = (ih, i)
@@ -195,10 +197,9 @@ def eve_display(eve):
         eve.CMD_DLSTART()
         eve.BITMAP_HANDLE(lh)
         for i, iname in enumerate(lnames):
-            eve.CMD_LOADIMAGE(iaddr + (i * 800 * 480 * 2) , 0)
             print(iname)
             with open(iname, "rb") as f:
-                eve.load(f)
+                cache.image(f.read(), iaddr + (i * 800 * 480 * 2))
             # Add handle and cell number to image dictionary.
             dictname, _ = os.path.splitext(os.path.basename(iname))
             logocell[dictname] = (lh, i)
@@ -208,6 +209,8 @@ def eve_display(eve):
         eve.CMD_SWAP()
         eve.LIB_AwaitCoProEmpty()
 
+    cache.save()
+
     directorysize = eve.LIB_TextSize(fontcell["Roboto-BoldCondensed_32_L4"], 0, "Directory")
     directoryheight = (directorysize & 0xffff) * 2
     directorywidth = directorysize >> 16
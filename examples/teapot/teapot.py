@@ -6,7 +6,6 @@ import argparse
 import math
 import sys
 import time
-import struct
 import gc
 import json
 import ctypes
@@ -51,8 +50,10 @@ def draw_scroll(eve, frame):
 
 def teapot(eve):
 
-    def c4(i):
-        return struct.pack("I", i)
+    parser = argparse.ArgumentParser(description="EVE teapot demo")
+    parser.add_argument('-p', '--pipeline',
+                    action='store_true', help="send frames from a background thread")
+    args = parser.parse_args(sys.argv[1:])
 
     def xform(xyz):
         rr = teapot_trackball.build_rotmatrix(curquat)
@@ -81,8 +82,10 @@ def teapot(eve):
     eve.LIB_EndCoProList()
     eve.LIB_AwaitCoProEmpty()
 
-    vertex_array    = 0x000000
-    draw_list       = 0x4040000
+    # The draw list has a BEGIN for each strip and an appended VERTEX2F
+    # for each point, and a few setup commands.
+    vertex_array    = eve.ramg.alloc(4 * len(vertices), 4, "vertex array")
+    draw_list       = eve.ramg.alloc(4 * (len(strips) + sum(len(s) for s in strips) + 16), 4, "draw list")
 
     eve.LIB_BeginCoProList()
     eve.CMD_NEWLIST(draw_list)
@@ -106,6 +109,10 @@ def teapot(eve):
     prev_touch = None
     spin = teapot_trackball.trackball(-.04, -.04, 0, 0)
 
+    if args.pipeline:
+        # Frame N is sent while the vertexes of frame N+1 are calculated.
+        eve.start_pipeline()
+
     t0 = time.monotonic()
     N = 3000
     frame = 0
@@ -113,18 +120,12 @@ def teapot(eve):
     while frame < N:
         # Calculate the vertexes of the teapot.
         (sx, sy) = xform(xyz)
-        # Format into a list of tuples.
-        vtx = list(zip(sx, sy))
-        # Make VERTEX2F commands from the tuples.
-        vxybuf = b''
-        for (vx, vy) in vtx:
-            vxybuf += c4((0x1 << 30) | ((vx & 32767) << 15) | (vy & 32767) ) 
         # Write the VERTEX2F commands to RAMG
         eve.LIB_BeginCoProList()
-        eve.CMD_MEMWRITE(0, len(vxybuf))
-        eve.LIB_WriteDataToCMD(vxybuf)
+        eve.VERTEX2F_ARRAY(sx, sy, vertex_array)
         eve.LIB_EndCoProList()
-        eve.LIB_AwaitCoProEmpty()
+        if not args.pipeline:
+            eve.LIB_AwaitCoProEmpty()
 
         eve.LIB_BeginCoProList()
         eve.CMD_DLSTART()
@@ -134,7 +135,8 @@ def teapot(eve):
         eve.CMD_CALLLIST(draw_list)
         eve.CMD_SWAP()
         eve.LIB_EndCoProList()
-        eve.LIB_AwaitCoProEmpty() 
+        if not args.pipeline:
+            eve.LIB_AwaitCoProEmpty() 
 
         eve.LIB_BeginCoProList()
         (ty, tx) = eve.LIB_GetTouch()
@@ -155,8 +157,12 @@ def teapot(eve):
 
         eve.CMD_GRAPHICSFINISH()
         eve.LIB_EndCoProList()
-        eve.LIB_AwaitCoProEmpty()
+        if not args.pipeline:
+            eve.LIB_AwaitCoProEmpty()
+        else:
+            eve.flush()
 
+    eve.finish()
     t1 = time.monotonic()
     took = t1 - t0
     print(f"{N} frames took {took:.3f} s. {N / took:.2f} fps")
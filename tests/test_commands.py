@@ -0,0 +1,318 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import struct
+import unittest
+
+from bteve2 import EVE2
+from bteve2.commands import DISPLAY_LIST, COPROCESSOR
+
+# The hand-written display list encoders that DISPLAY_LIST replaced.
+# BitmapZorder was commented out, it is included so that the table entry
+# is checked.
+class Reference:
+
+    def __init__(self):
+        self.words = []
+
+    def c4(self, i):
+        self.words.append(i)
+
+    def AlphaFunc(self, func,ref):
+        self.c4((9 << 24) | ((int(func) & 7) << 8) | ((int(ref) & 255)))
+    def Begin(self, prim):
+        self.c4((31 << 24) | ((int(prim) & 15)))
+    def BitmapExtFormat(self, fmt):
+        self.c4((46 << 24) | (int(fmt) & 65535))
+    def BitmapHandle(self, handle):
+        self.c4((5 << 24) | ((int(handle) & 63)))
+    def BitmapLayout(self, format,linestride,height):
+        self.c4((7 << 24) | ((int(format) & 31) << 19) | ((int(linestride) & 1023) << 9) | ((int(height) & 511)))
+    def BitmapLayoutH(self, linestride,height):
+        self.c4((40 << 24) | (((linestride) & 3) << 2) | (((height) & 3)))
+    def BitmapSize(self, filter,wrapx,wrapy,width,height):
+        self.c4((8 << 24) | ((int(filter) & 1) << 20) | ((int(wrapx) & 1) << 19) | ((int(wrapy) & 1) << 18) | ((int(width) & 511) << 9) | ((int(height) & 511)))
+    def BitmapSizeH(self, width,height):
+        self.c4((41 << 24) | (((width) & 3) << 2) | (((height) & 3)))
+    def BitmapSource(self, addr):
+        self.c4((1 << 24) | ((int(addr) & 0xffffff)))
+    def BitmapSourceH(self, addr):
+        self.c4((49 << 24) | ((int(addr) & 0xff)))
+    def BitmapSwizzle(self, r, g, b, a):
+        self.c4((47 << 24) | ((int(r) & 7) << 9) | ((int(g) & 7) << 6) | ((int(b) & 7) << 3) | ((int(a) & 7)))
+    def BitmapTransformA(self, p, a):
+        self.c4((21 << 24) | ((int(p) & 1) << 17) | ((int(a) & 131071)))
+    def BitmapTransformB(self, p, b):
+        self.c4((22 << 24) | ((int(p) & 1) << 17) | ((int(b) & 131071)))
+    def BitmapTransformC(self, c):
+        self.c4((23 << 24) | (int(c) & 16777215))
+    def BitmapTransformD(self, p, d):
+        self.c4((24 << 24) | ((int(p) & 1) << 17) | ((int(d) & 131071)))
+    def BitmapTransformE(self, p, e):
+        self.c4((25 << 24) | ((int(p) & 1) << 17) | ((int(e) & 131071)))
+    def BitmapTransformF(self, f):
+        self.c4((26 << 24) | (int(f) & 16777215))
+    def BitmapZorder(self,o):
+        self.c4((51 << 24) | (int(o) & 255))
+    def BlendFunc(self, src,dst):
+        self.c4((11 << 24) | ((int(src) & 7) << 3) | ((int(dst) & 7)))
+    def Call(self, dest):
+        self.c4((29 << 24) | ((int(dest) & 65535)))
+    def Cell(self, cell):
+        self.c4((6 << 24) | ((int(cell) & 127)))
+    def ClearColorA(self, alpha):
+        self.c4((15 << 24) | ((int(alpha) & 255)))
+    def ClearColorRGB(self, red,green,blue):
+        self.c4((2 << 24) | ((int(red) & 255) << 16) | ((int(green) & 255) << 8) | ((int(blue) & 255)))
+    def Clear(self, c = 1,s = 1,t = 1):
+        self.c4((38 << 24) | ((int(c) & 1) << 2) | ((int(s) & 1) << 1) | ((int(t) & 1)))
+    def ClearStencil(self, s):
+        self.c4((17 << 24) | ((int(s) & 255)))
+    def ClearTag(self, s):
+        self.c4((18 << 24) | ((int(s) & 0xffffff)))
+    def ColorA(self, alpha):
+        self.c4((16 << 24) | ((int(alpha) & 255)))
+    def ColorMask(self, r,g,b,a):
+        self.c4((32 << 24) | ((int(r) & 1) << 3) | ((int(g) & 1) << 2) | ((int(b) & 1) << 1) | ((int(a) & 1)))
+    def ColorRGB(self, red,green,blue):
+        self.c4((4 << 24) | ((int(red) & 255) << 16) | ((int(green) & 255) << 8) | ((int(blue) & 255)))
+    def Display(self):
+        self.c4((0 << 24))
+    def End(self):
+        self.c4((33 << 24))
+    def Jump(self, dest):
+        self.c4((30 << 24) | ((int(dest) & 65535)))
+    def LineWidth(self, width):
+        self.c4((14 << 24) | ((int(width) & 4095)))
+    def Macro(self, m):
+        self.c4((37 << 24) | ((int(m) & 1)))
+    def Nop(self):
+        self.c4((45 << 24))
+    def PaletteSource(self, addr):
+        self.c4((42 << 24) | (((addr) & 0xffffff)))
+    def PaletteSourceH(self, addr):
+        self.c4((50 << 24) | (((addr >> 24) & 255)))
+    def PointSize(self, size):
+        self.c4((13 << 24) | ((int(size) & 8191)))
+    def Region(self,y,h,dest):
+        self.c4((52 << 24) | ((int(y) & 63) << 18) | ((int(h) & 63 ) << 12) | (int(dest) & 4095))
+    def RestoreContext(self):
+        self.c4((35 << 24))
+    def Return(self):
+        self.c4((36 << 24))
+    def SaveContext(self):
+        self.c4((34 << 24))
+    def ScissorSize(self, width,height):
+        self.c4((28 << 24) | ((int(width) & 4095) << 12) | ((int(height) & 4095)))
+    def ScissorXY(self, x,y):
+        self.c4((27 << 24) | ((int(x) & 2047) << 11) | ((int(y) & 2047)))
+    def StencilFunc(self, func,ref,mask):
+        self.c4((10 << 24) | ((int(func) & 7) << 16) | ((int(ref) & 255) << 8) | ((int(mask) & 255)))
+    def StencilMask(self, mask):
+        self.c4((19 << 24) | ((int(mask) & 255)))
+    def StencilOp(self, sfail,spass):
+        self.c4((12 << 24) | ((int(sfail) & 7) << 3) | ((int(spass) & 7)))
+    def TagMask(self, mask):
+        self.c4((20 << 24) | ((int(mask) & 1)))
+    def Tag(self, s):
+        self.c4((3 << 24) | ((int(s) & 0xffffff)))
+    def VertexFormat(self, frac):
+        self.c4((39 << 24) | (int(frac) & 7))
+    def Vertex2f(self, x, y):
+        self.c4(0x40000000 | ((int(x) & 32767) << 15) | (int(y) & 32767))
+    def Vertex2ii(self, x, y, handle = 0, cell = 0):
+        self.c4((2 << 30) | ((int(x) & 511) << 21) | ((int(y) & 511) << 12) | ((int(handle) & 31) << 7) | ((int(cell) & 127)))
+    def VertexTranslateX(self, x):
+        self.c4((43 << 24) | (((int(x)) & 131071)))
+    def VertexTranslateY(self, y):
+        self.c4((44 << 24) | (((int(y)) & 131071)))
+
+# The hand-written numeric coprocessor commands that COPROCESSOR replaced:
+# the opcode, the struct format and the number of zeros added for the
+# trailing reserved fields.
+REFERENCE_COPROCESSOR = {
+    'CMD_ANIMDRAW':           (0x4f, 'i',             0),
+    'CMD_ANIMFRAME':          (0x5e, 'hhII',          0),
+    'CMD_ANIMSTART':          (0x5f, 'iII',           0),
+    'CMD_ANIMSTOP':           (0x4d, 'i',             0),
+    'CMD_ANIMXY':             (0x4e, 'ihh',           0),
+    'CMD_APPEND':             (0x1c, 'II',            0),
+    'CMD_APPENDF':            (0x52, 'II',            0),
+    'CMD_ARC':                (0x87, 'hhHHHH',        0),
+    'CMD_BGCOLOR':            (0x07, 'I',             0),
+    'CMD_BITMAP_TRANSFORM':   (0x1f, 'iiiiiiiiiiiiHH', 1),
+    'CMD_CALIBRATE':          (0x13, 'I',             0),
+    'CMD_CALIBRATESUB':       (0x56, 'HHHHI',         0),
+    'CMD_CALLLIST':           (0x5b, 'I',             0),
+    'CMD_CGRADIENT':          (0x8a, 'IhhhhII',       0),
+    'CMD_CLOCK':              (0x12, 'hhhHHHHH',      0),
+    'CMD_COLDSTART':          (0x2e, '',              0),
+    'CMD_COPYLIST':           (0x88, 'I',             0),
+    'CMD_DDRSHUTDOWN':        (0x65, '',              0),
+    'CMD_DDRSTARTUP':         (0x66, '',              0),
+    'CMD_DIAL':               (0x29, 'hhhHI',         0),
+    'CMD_DLSTART':            (0x00, '',              0),
+    'CMD_ENABLEREGION':       (0x7e, 'I',             0),
+    'CMD_ENDLIST':            (0x5d, '',              0),
+    'CMD_FENCE':              (0x68, '',              0),
+    'CMD_FGCOLOR':            (0x08, 'I',             0),
+    'CMD_FILLWIDTH':          (0x51, 'I',             0),
+    'CMD_FLASHATTACH':        (0x43, '',              0),
+    'CMD_FLASHDETACH':        (0x42, '',              0),
+    'CMD_FLASHERASE':         (0x3e, '',              0),
+    'CMD_FLASHFAST':          (0x44, 'I',             0),
+    'CMD_FLASHPROGRAM':       (0x64, 'III',           0),
+    'CMD_FLASHREAD':          (0x40, 'III',           0),
+    'CMD_FLASHSOURCE':        (0x48, 'I',             0),
+    'CMD_FLASHSPIDESEL':      (0x45, '',              0),
+    'CMD_FLASHSPIRX':         (0x47, 'II',            0),
+    'CMD_FLASHSPITX':         (0x46, 'I',             0),
+    'CMD_FLASHUPDATE':        (0x41, 'III',           0),
+    'CMD_FLASHWRITE':         (0x3f, 'II',            0),
+    'CMD_FSOPTIONS':          (0x6d, 'I',             0),
+    'CMD_GAUGE':              (0x11, 'hhhHHHHH',      0),
+    'CMD_GETIMAGE':           (0x58, 'IIIII',         0),
+    'CMD_GETMATRIX':          (0x2f, 'iiiiii',        0),
+    'CMD_GETPROPS':           (0x22, 'III',           0),
+    'CMD_GETPTR':             (0x20, 'I',             0),
+    'CMD_GLOW':               (0x8b, 'hhhh',          0),
+    'CMD_GRADCOLOR':          (0x30, 'I',             0),
+    'CMD_GRADIENT':           (0x09, 'hhIhhI',        0),
+    'CMD_GRADIENTA':          (0x50, 'hhIhhI',        0),
+    'CMD_GRAPHICSFINISH':     (0x6b, '',              0),
+    'CMD_I2SSTARTUP':         (0x69, 'I',             0),
+    'CMD_INFLATE':            (0x4a, 'II',            0),
+    'CMD_INTERRUPT':          (0x02, 'I',             0),
+    'CMD_LOADASSET':          (0x81, 'II',            0),
+    'CMD_LOADIDENTITY':       (0x23, '',              0),
+    'CMD_LOADIMAGE':          (0x21, 'II',            0),
+    'CMD_LOADWAV':            (0x85, 'II',            0),
+    'CMD_LOGO':               (0x2d, '',              0),
+    'CMD_MEDIAFIFO':          (0x34, 'II',            0),
+    'CMD_MEMCPY':             (0x1b, 'III',           0),
+    'CMD_MEMCRC':             (0x16, 'III',           0),
+    'CMD_MEMSET':             (0x19, 'III',           0),
+    'CMD_MEMWRITE':           (0x18, 'II',            0),
+    'CMD_MEMZERO':            (0x1a, 'II',            0),
+    'CMD_NEWLIST':            (0x5c, 'I',             0),
+    'CMD_NOP':                (0x53, '',              0),
+    'CMD_NUMBER':             (0x2a, 'hhhHi',         0),
+    'CMD_PLAYVIDEO':          (0x35, 'I',             0),
+    'CMD_PLAYWAV':            (0x79, 'I',             0),
+    'CMD_PROGRESS':           (0x0d, 'hhhhHHHH',      1),
+    'CMD_REGREAD':            (0x17, 'II',            0),
+    'CMD_REGWRITE':           (0x86, 'II',            0),
+    'CMD_RENDERTARGET':       (0x8d, 'IHhhH',         1),
+    'CMD_RESETFONTS':         (0x4c, '',              0),
+    'CMD_RESTORECONTEXT':     (0x7d, '',              0),
+    'CMD_RESULT':             (0x89, 'I',             0),
+    'CMD_RETURN':             (0x5a, '',              0),
+    'CMD_ROMFONT':            (0x39, 'II',            0),
+    'CMD_ROTATE':             (0x26, 'i',             0),
+    'CMD_ROTATEAROUND':       (0x4b, 'iiii',          0),
+    'CMD_RUNANIM':            (0x60, 'Ii',            0),
+    'CMD_SAVECONTEXT':        (0x7c, '',              0),
+    'CMD_SCALE':              (0x25, 'ii',            0),
+    'CMD_SCREENSAVER':        (0x2b, '',              0),
+    'CMD_SCROLLBAR':          (0x0f, 'hhhhHHHH',      0),
+    'CMD_SDATTACH':           (0x6e, 'II',            0),
+    'CMD_SDBLOCKREAD':        (0x6f, 'IIII',          0),
+    'CMD_SETBASE':            (0x33, 'I',             0),
+    'CMD_SETBITMAP':          (0x3d, 'IHHHH',         1),
+    'CMD_SETFONT':            (0x36, 'III',           0),
+    'CMD_SETMATRIX':          (0x27, '',              0),
+    'CMD_SETROTATE':          (0x31, 'I',             0),
+    'CMD_SETSCRATCH':         (0x37, 'I',             0),
+    'CMD_SKETCH':             (0x2c, 'hhHHIHH',       1),
+    'CMD_SKIPCOND':           (0x8c, 'IIIII',         0),
+    'CMD_SLIDER':             (0x0e, 'hhhhHHHH',      1),
+    'CMD_SNAPSHOT':           (0x1d, 'I',             0),
+    'CMD_SPINNER':            (0x14, 'hhHH',          0),
+    'CMD_STOP':               (0x15, '',              0),
+    'CMD_SWAP':               (0x01, '',              0),
+    'CMD_SYNC':               (0x3c, '',              0),
+    'CMD_TESTCARD':           (0x57, '',              0),
+    'CMD_TRACK':              (0x28, 'hhhhhH',        1),
+    'CMD_TRANSLATE':          (0x24, 'ii',            0),
+    'CMD_VIDEOFRAME':         (0x3b, 'II',            0),
+    'CMD_VIDEOSTART':         (0x3a, 'I',             0),
+    'CMD_WAIT':               (0x59, 'I',             0),
+    'CMD_WAITCHANGE':         (0x67, 'I',             0),
+    'CMD_WAITCOND':           (0x78, 'IIII',          0),
+    'CMD_WATCHDOG':           (0x83, 'I',             0),
+    'CMD_LOADPATCH':          (0x82, 'I',             0),
+}
+
+# Parameter values for each struct format code: limits, values which need
+# masking, negative values and floats.
+VALUES = {
+    "I": (0, 1, 0xffffffff, 1234.7, 0x80000000),
+    "i": (-1, -0x80000000, 0x7fffffff, -3.7, 5),
+    "H": (0, 0xffff, 7.9, 1, 0x8000),
+    "h": (-0x8000, 0x7fff, -1, 2.5, 0),
+}
+
+# Display list parameter values: limits of each mask, values above them,
+# negative values and floats.
+DL_VALUES = (0, 1, -1, -3, 7, 255, 256, 511, 4095, 32767, 65536, 0xffffff, 0x1000000, 3.7, -2.5, 2**31 - 1)
+
+class TestCommands(unittest.TestCase):
+
+    def setUp(self):
+        eve = EVE2.__new__(EVE2)
+        eve.register(eve)
+        self.eve = eve
+
+    # Return the bytes added to the command buffer by calling fn.
+    def encode(self, fn, *args):
+        eve = self.eve
+        eve.bufptr = 0
+        fn(eve, *args)
+        return bytes(eve.buf[:eve.bufptr])
+
+    def reference(self, camel, args):
+        ref = Reference()
+        try:
+            getattr(ref, camel)(*args)
+        except TypeError:
+            # The hand-written encoder did not accept these values.
+            return None
+        return struct.pack("<%dI" % len(ref.words), *ref.words)
+
+    def test_display_list(self):
+        for (camel, upper, word, fields, defaults) in DISPLAY_LIST:
+            n = len(fields)
+            calls = []
+            for k in range(len(DL_VALUES)):
+                calls.append([DL_VALUES[(k + 3 * j) % len(DL_VALUES)] for j in range(n)])
+            for d in range(1, len(defaults) + 1):
+                calls.append([DL_VALUES[j + 4] for j in range(n - d)])
+            for args in calls:
+                expected = self.reference(camel, args)
+                if expected is None:
+                    continue
+                for name in (camel, upper):
+                    with self.subTest(name = name, args = args):
+                        self.assertEqual(self.encode(getattr(EVE2, name), *args), expected)
+
+    def test_coprocessor(self):
+        table = { name : (op, fmt) for (name, op, fmt) in COPROCESSOR }
+        self.assertEqual(set(table), set(REFERENCE_COPROCESSOR) - {"CMD_DLSTART"})
+        for (name, (op, fmt, zeros)) in REFERENCE_COPROCESSOR.items():
+            for k in range(len(VALUES["I"])):
+                args = [VALUES[c][(k + j) % len(VALUES[c])] for (j, c) in enumerate(fmt[:len(fmt) - zeros])]
+                s = struct.pack("I" + fmt, 0xffffff00 | op, *([int(a) for a in args] + [0] * zeros))
+                expected = s + bytes(-len(s) & 3)
+                with self.subTest(name = name, args = args):
+                    self.assertEqual(self.encode(getattr(EVE2, name), *args), expected)
+
+    def test_coprocessor_range(self):
+        # Values out of the range of the format are refused, as before.
+        for (name, op, fmt) in COPROCESSOR:
+            if "H" in fmt:
+                args = [-1 if c == "H" else 0 for c in fmt.rstrip("x")]
+                with self.subTest(name = name):
+                    with self.assertRaises(struct.error):
+                        self.encode(getattr(EVE2, name), *args)
+
+if __name__ == "__main__":
+    unittest.main()
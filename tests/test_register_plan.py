@@ -0,0 +1,36 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import unittest
+
+from bteve2.eve import EVE2
+
+class TestRegisterPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.eve = EVE2.__new__(EVE2)
+
+    def spans(self, names):
+        (record, blocks) = self.eve.register_plan(names)
+        return [(a, a + size) for (a, size, fields) in blocks]
+
+    def test_int_flags_not_covered(self):
+        names = ("REG_FRAMES", "REG_CLOCK", "REG_DISP", "REG_INT_EN", "REG_CMD_READ", "REG_CMDB_SPACE")
+        for (start, end) in self.spans(names):
+            for r in EVE2.READ_CLEARS:
+                self.assertFalse(start <= r < end, "Block %x-%x reads %x" % (start, end, r))
+
+    def test_int_flags_when_asked(self):
+        names = ("REG_DISP", "REG_INT_FLAGS", "REG_INT_EN")
+        self.assertEqual(len(self.spans(names)), 1)
+
+    def test_fields(self):
+        names = ("REG_CLOCK", "REG_FRAMES", "REG_INT_EN", "REG_DISP")
+        (record, blocks) = self.eve.register_plan(names)
+        found = {}
+        for (a, size, fields) in blocks:
+            for (offset, index) in fields:
+                found[names[index]] = a + offset
+        self.assertEqual(found, {n: getattr(EVE2, n) for n in names})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# For Bridgetek Pte. Ltd. license see `LICENSE.txt`
+
+import struct
+import unittest
+
+import bteve2
+from bteve2.eve import ResultException
+
+# Commands written to REG_CMDB_WRITE are kept in a RAM_CMD ring, as if the
+# co-processor ran them at once without changing them. The results are
+# the values that the commands were given.
+class Ring:
+
+    def __init__(self, eve):
+        self.eve = eve
+        self.sent = 0
+        self.ram = bytearray(eve.FIFO_MAX + 4)
+
+    def cs(self, v):
+        pass
+
+    def rd(self, a, n):
+        eve = self.eve
+        if a in (eve.REG_CMD_READ, eve.REG_CMD_WRITE):
+            return struct.pack("I", self.sent & eve.FIFO_MAX)
+        if a == eve.REG_CMDB_SPACE:
+            return struct.pack("I", eve.FIFO_MAX)
+        if eve.RAM_CMD <= a < eve.RAM_CMD + len(self.ram):
+            a -= eve.RAM_CMD
+            return bytes(self.ram[a:a + n])
+        return bytes(n)
+
+    def wr(self, a, s, inc = True):
+        if a == self.eve.REG_CMDB_WRITE:
+            for b in bytes(s):
+                self.ram[self.sent % len(self.ram)] = b
+                self.sent += 1
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        eve = bteve2.EVE2.__new__(bteve2.EVE2)
+        self.ring = Ring(eve)
+        eve.rd = self.ring.rd
+        eve.wr = self.ring.wr
+        eve.cs = self.ring.cs
+        eve.register(eve)
+        eve.space = eve.FIFO_MAX
+        self.eve = eve
+
+    def test_read_together(self):
+        eve = self.eve
+        results = []
+        for i in range(10):
+            eve.CMD_MEMCRC(0, 4, 1000 + i)
+            results.append(eve.result())
+        self.assertEqual([r.result() for r in results], [1000 + i for i in range(10)])
+
+    def test_large_write(self):
+        eve = self.eve
+        eve.CMD_MEMCRC(0, 4, 1234)
+        first = eve.result()
+        eve.LIB_WriteDataToCMD(bytes(20000))
+        eve.CMD_MEMCRC(0, 4, 5678)
+        second = eve.result()
+        eve.LIB_WriteDataToCMD(bytes(40000))
+        self.assertEqual((first.result(), second.result()), (1234, 5678))
+
+    def test_large_write_pipeline(self):
+        eve = self.eve
+        eve.start_pipeline()
+        try:
+            eve.CMD_MEMCRC(0, 4, 1234)
+            first = eve.result()
+            eve.LIB_WriteDataToCMD(bytes(20000))
+            self.assertEqual(first.result(), 1234)
+        finally:
+            eve.pipeline.stop()
+
+    def test_overwritten(self):
+        eve = self.eve
+        eve.CMD_MEMCRC(0, 4, 1234)
+        first = eve.result()
+        eve.results = ()
+        eve.LIB_WriteDataToCMD(bytes(20000))
+        eve.finish()
+        with self.assertRaises(ResultException):
+            eve.read_results([first])
+
+if __name__ == "__main__":
+    unittest.main()